@@ -173,6 +173,14 @@ class FundingRateArbController(ControllerBase):
         # Decision audit log (for validation)
         self.decision_log: List[Dict] = []
 
+        # Spread and stop-loss thresholds as floats: they are compared on every bar, while
+        # Decimal is kept for order sizing and PNL (config fields stay Decimal)
+        self._min_spread = float(config.min_funding_rate_profitability)
+        self._exit_min_spread = float(config.absolute_min_spread_exit)
+        self._compression_exit = float(config.compression_exit_threshold)
+        self._position_value = float(config.position_size_quote) * 2
+        self._max_loss_pct = float(config.max_loss_per_position_pct)
+
     async def update_processed_data(self):
         """
         Scan for funding rate arbitrage opportunities.
@@ -208,7 +216,7 @@ class FundingRateArbController(ControllerBase):
             conn1, conn2, side, spread = best
 
             # Check profitability threshold
-            if conn1 and spread >= self.config.min_funding_rate_profitability:
+            if conn1 and spread >= self._min_spread:
                 opportunities.append({
                     'token': token,
                     'connector_1': conn1,
@@ -276,38 +284,37 @@ class FundingRateArbController(ControllerBase):
 
         Returns: (connector_1, connector_2, side, spread)
         """
-        best_spread = Decimal('0')
+        # Hourly rates are computed once per connector, then every pair is compared
+        hourly_rates = {
+            connector: self._hourly_rate(info.rate, connector)
+            for connector, info in funding_rates.items()
+        }
+
+        best_spread = 0.0
         best_combo = None
 
-        connectors = list(funding_rates.keys())
+        connectors = list(hourly_rates.keys())
 
         for i, conn1 in enumerate(connectors):
+            rate1 = hourly_rates[conn1]
             for conn2 in connectors[i+1:]:
-                # Normalize rates to per-second basis
-                rate1 = self._normalize_rate(
-                    funding_rates[conn1].rate,
-                    self.FUNDING_INTERVALS[conn1]
-                )
-                rate2 = self._normalize_rate(
-                    funding_rates[conn2].rate,
-                    self.FUNDING_INTERVALS[conn2]
-                )
-
-                # Calculate spread (hourly basis for comparison)
-                spread_hourly = abs(rate1 - rate2) * Decimal('3600')
+                rate2 = hourly_rates[conn2]
+                spread_hourly = abs(rate1 - rate2)
 
                 if spread_hourly > best_spread:
                     # Determine which side to take
                     # Long on lower rate exchange, short on higher rate
                     side = TradeType.BUY if rate1 < rate2 else TradeType.SELL
                     best_spread = spread_hourly
-                    best_combo = (conn1, conn2, side, spread_hourly)
+                    best_combo = (conn1, conn2, side)
 
-        return best_combo if best_combo else (None, None, None, Decimal('0'))
+        if best_combo is None:
+            return (None, None, None, 0.0)
+        return (*best_combo, best_spread)
 
-    def _normalize_rate(self, rate: Decimal, interval_seconds: int) -> Decimal:
-        """Normalize funding rate to per-second basis."""
-        return rate / Decimal(str(interval_seconds))
+    def _hourly_rate(self, rate: Decimal, connector_name: str) -> float:
+        """Normalize funding rate to an hourly basis."""
+        return float(rate) * 3600 / self.FUNDING_INTERVALS[connector_name]
 
     def create_actions_proposal(self) -> List[ExecutorAction]:
         """
@@ -445,17 +452,11 @@ class FundingRateArbController(ControllerBase):
 
         return stop_actions
 
-    def _calculate_current_spread(self, funding_rates, conn1, conn2, side) -> Decimal:
-        """Calculate current funding spread."""
-        rate1 = self._normalize_rate(
-            funding_rates[conn1].rate,
-            self.FUNDING_INTERVALS[conn1]
-        )
-        rate2 = self._normalize_rate(
-            funding_rates[conn2].rate,
-            self.FUNDING_INTERVALS[conn2]
-        )
-        return abs(rate1 - rate2) * Decimal('3600')  # Hourly basis
+    def _calculate_current_spread(self, funding_rates, conn1, conn2, side) -> float:
+        """Calculate current funding spread (hourly basis)."""
+        rate1 = self._hourly_rate(funding_rates[conn1].rate, conn1)
+        rate2 = self._hourly_rate(funding_rates[conn2].rate, conn2)
+        return abs(rate1 - rate2)
 
     def _should_exit_position(self, arb_info, current_spread, current_time) -> Tuple[bool, str]:
         """
@@ -469,12 +470,12 @@ class FundingRateArbController(ControllerBase):
         # 1. Spread compression check
         if entry_spread > 0:
             compression_ratio = current_spread / entry_spread
-            if compression_ratio < self.config.compression_exit_threshold:
+            if compression_ratio < self._compression_exit:
                 compression_pct = (1 - compression_ratio) * 100
                 return True, f"Spread compressed {compression_pct:.1f}%"
 
         # 2. Absolute minimum spread
-        if current_spread < self.config.absolute_min_spread_exit:
+        if current_spread < self._exit_min_spread:
             return True, f"Spread below minimum: {current_spread:.4f}"
 
         # 3. Max duration
@@ -484,11 +485,10 @@ class FundingRateArbController(ControllerBase):
         # 4. Stop loss (if PNL available)
         executors = self._get_active_executors(arb_info['executors_ids'])
         if executors:
-            total_pnl = sum(e.net_pnl_quote for e in executors)
-            position_value = self.config.position_size_quote * 2
-            pnl_pct = total_pnl / position_value if position_value > 0 else 0
+            total_pnl = sum(float(e.net_pnl_quote) for e in executors)
+            pnl_pct = total_pnl / self._position_value if self._position_value > 0 else 0.0
 
-            if pnl_pct <= -self.config.max_loss_per_position_pct:
+            if pnl_pct <= -self._max_loss_pct:
                 return True, f"Stop loss: {pnl_pct:.2%}"
 
         return False, ""
@@ -498,7 +498,7 @@ class FundingRateArbController(ControllerBase):
         return [e for e in self.executors_info if e.id in executor_ids and e.is_active]
 
     def _log_decision(self, action: str, token: str, funding_rates: Dict,
-                      spread: Decimal, timestamp: float, reason: str = ""):
+                      spread: float, timestamp: float, reason: str = ""):
         """Log decision for audit trail."""
         log_entry = {
             'timestamp': timestamp,
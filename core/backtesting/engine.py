@@ -1,6 +1,6 @@
 import logging
 import os
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 
 import pandas as pd
 
@@ -13,13 +13,60 @@ from hummingbot.strategy_v2.controllers import ControllerConfigBase
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Funding feeds already decoded in this process (with their metadata), keyed by
+# directory + parquet mtimes. Holds a single entry: repeated engines over the same
+# files skip the parquet load.
+_funding_feeds_cache: Dict[tuple, Tuple[Dict[str, pd.DataFrame], Dict[str, Dict[str, int]]]] = {}
+
+# String label columns of a funding feed; each feed holds one exchange/token, so these
+# collapse to a single category
+FUNDING_LABEL_COLUMNS = ('exchange', 'base', 'quote', 'target')
+
+
+def build_funding_feed_meta(funding_feeds: Dict[str, pd.DataFrame]) -> Dict[str, Dict[str, int]]:
+    """
+    Sort each funding feed by timestamp (replacing it in the dict if needed) and return
+    its coverage, {'ts_min', 'ts_max', 'n'} per feed key, read from the sorted ends.
+    """
+    meta = {}
+    for feed_key, df in funding_feeds.items():
+        if not df['timestamp'].is_monotonic_increasing:
+            df = df.sort_values('timestamp', kind='stable', ignore_index=True)
+            funding_feeds[feed_key] = df
+        if df.empty:
+            continue
+        meta[feed_key] = {
+            'ts_min': int(df['timestamp'].iat[0]),
+            'ts_max': int(df['timestamp'].iat[-1]),
+            'n': len(df),
+        }
+    return meta
+
+
+def slice_funding_feeds(funding_feeds: Dict[str, pd.DataFrame], start: int, end: int,
+                        buffer: int = 3600) -> None:
+    """
+    Trim each (timestamp-sorted) funding feed in place to [start - buffer, end]. The
+    buffer keeps the last rate published before start, which is the one in force there.
+    """
+    for feed_key, df in funding_feeds.items():
+        lo = int(df['timestamp'].searchsorted(start - buffer, side='left'))
+        hi = int(df['timestamp'].searchsorted(end, side='right'))
+        if lo > 0 or hi < len(df):
+            funding_feeds[feed_key] = df.iloc[lo:hi]
+
 
 class BacktestingEngine:
-    def __init__(self, load_cached_data: bool = True, custom_backtester: Optional[BacktestingEngineBase] = None):
+    def __init__(self, load_cached_data: bool = True, custom_backtester: Optional[BacktestingEngineBase] = None,
+                 funding_date_range: Optional[Tuple[int, int]] = None):
         self._bt_engine = custom_backtester if custom_backtester is not None else BacktestingEngineBase()
+        # Per-feed coverage ({'ts_min', 'ts_max', 'n'}), filled when funding data is loaded
+        self.funding_feed_meta: Dict[str, Dict[str, int]] = {}
         if load_cached_data:
             self._load_candles_cache()
             self._load_funding_cache()
+            if funding_date_range is not None:
+                self._slice_funding_feeds(*funding_date_range)
             self._generate_synthetic_candles()  # Generate synthetic candles for mock connectors
             self._register_mock_connectors()
 
@@ -61,10 +108,44 @@ class BacktestingEngine:
             logger.warning(f"Funding directory {funding_path} does not exist.")
             return
 
+        data_provider = self._bt_engine.backtesting_data_provider
+        cache_key = (
+            str(funding_path),
+            tuple(sorted((f.name, f.stat().st_mtime_ns) for f in funding_path.glob('*.parquet')))
+        )
+
+        cached = _funding_feeds_cache.get(cache_key)
+        if cached is not None:
+            cached_feeds, cached_meta = cached
+            data_provider.funding_feeds.update(cached_feeds)
+            self.funding_feed_meta = dict(cached_meta)
+            logger.info("✅ Funding cache reused from memory")
+            return
+
         # Call data provider's loader
-        self._bt_engine.backtesting_data_provider.load_funding_rate_data(funding_path)
+        data_provider.load_funding_rate_data(funding_path)
+
+        for df in data_provider.funding_feeds.values():
+            labels = [column for column in FUNDING_LABEL_COLUMNS
+                      if column in df.columns and df[column].dtype == object]
+            if labels:
+                df[labels] = df[labels].astype('category')
+
+        self.funding_feed_meta = build_funding_feed_meta(data_provider.funding_feeds)
+
+        _funding_feeds_cache.clear()
+        _funding_feeds_cache[cache_key] = (dict(data_provider.funding_feeds), dict(self.funding_feed_meta))
         logger.info("✅ Funding cache loaded successfully")
 
+    def _slice_funding_feeds(self, start: int, end: int):
+        """Keep only the funding rows a backtest over [start, end] can read."""
+        funding_feeds = self._bt_engine.backtesting_data_provider.funding_feeds
+        if not funding_feeds:
+            return
+        # The process-wide cache holds its own dict, so the full feeds stay available
+        slice_funding_feeds(funding_feeds, start, end)
+        self.funding_feed_meta = build_funding_feed_meta(funding_feeds)
+
     def _generate_synthetic_candles(self):
         """
         Generate synthetic candles data for tokens that don't have historical candles.
@@ -12,6 +12,7 @@ Reference: FUNDING_RATE_ARB_BACKTEST_PLAN.md - Component 3
 import logging
 from pathlib import Path
 from typing import Optional, Tuple, List, Dict
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
@@ -51,13 +52,21 @@ class FundingRateBacktestDataProvider:
         self.start_timestamp: Optional[int] = None
         self.end_timestamp: Optional[int] = None
 
+        # As-of lookup table built by load_data(): rates[time_idx, exchange_idx, token_idx]
+        self._time_index: Optional[np.ndarray] = None
+        self._rates: Optional[np.ndarray] = None
+        self._has_rate: Optional[np.ndarray] = None
+        self._exchange_idx: Dict[str, int] = {}
+        self._token_idx: Dict[str, int] = {}
+
         logger.info(f"FundingRateBacktestDataProvider initialized")
         logger.info(f"  Data path: {self.data_path}")
 
     def load_data(
         self,
         start_date: Optional[str] = None,
-        end_date: Optional[str] = None
+        end_date: Optional[str] = None,
+        tokens: Optional[List[str]] = None
     ) -> pd.DataFrame:
         """
         Load historical funding rate data from parquet files.
@@ -65,6 +74,8 @@ class FundingRateBacktestDataProvider:
         Args:
             start_date: Start date in 'YYYY-MM-DD' format (None = all data)
             end_date: End date in 'YYYY-MM-DD' format (None = all data)
+            tokens: Only load these base tokens (None = all tokens). Pushed down to the
+                    parquet reader, so row groups for other tokens are never decoded.
 
         Returns:
             DataFrame with loaded funding rate data
@@ -91,9 +102,10 @@ class FundingRateBacktestDataProvider:
             raise ValueError(f"No data found in range {start_date} to {end_date}")
 
         # Load and combine all files
+        filters = [('base', 'in', list(tokens))] if tokens else None
         dfs = []
         for file in parquet_files:
-            df = pd.read_parquet(file)
+            df = pd.read_parquet(file, filters=filters)
             dfs.append(df)
 
         self.data = pd.concat(dfs, ignore_index=True)
@@ -107,6 +119,8 @@ class FundingRateBacktestDataProvider:
         self.start_timestamp = int(self.data['timestamp'].min())
         self.end_timestamp = int(self.data['timestamp'].max())
 
+        self._build_rate_table()
+
         logger.info(f"✅ Loaded {len(self.data)} records")
         logger.info(f"  Date range: {datetime.fromtimestamp(self.start_timestamp)} to {datetime.fromtimestamp(self.end_timestamp)}")
         logger.info(f"  Exchanges: {', '.join(self.exchanges)}")
@@ -114,6 +128,33 @@ class FundingRateBacktestDataProvider:
 
         return self.data
 
+    def _build_rate_table(self):
+        """
+        Build the (time, exchange, token) lookup table behind get_funding_rate().
+
+        Each cell holds the most recent rate at or before that timestamp, so a query
+        is one binary search over the unique timestamps plus an array index.
+        """
+        self._time_index = np.unique(self.data['timestamp'].to_numpy())
+        self._exchange_idx = {exchange: i for i, exchange in enumerate(self.exchanges)}
+        self._token_idx = {token: i for i, token in enumerate(self.tokens)}
+
+        t_idx = np.searchsorted(self._time_index, self.data['timestamp'].to_numpy())
+        e_idx = pd.Index(self.exchanges).get_indexer(self.data['exchange'])
+        k_idx = pd.Index(self.tokens).get_indexer(self.data['base'])
+
+        shape = (len(self._time_index), len(self.exchanges), len(self.tokens))
+        rates = np.full(shape, np.nan)
+        rates[t_idx, e_idx, k_idx] = self.data['funding_rate'].to_numpy(dtype=np.float64)
+
+        # Carry the last observed row forward along time for every (exchange, token)
+        last_seen = np.full(shape, -1, dtype=np.int64)
+        last_seen[t_idx, e_idx, k_idx] = t_idx
+        np.maximum.accumulate(last_seen, axis=0, out=last_seen)
+
+        self._has_rate = last_seen >= 0
+        self._rates = np.take_along_axis(rates, np.maximum(last_seen, 0), axis=0)
+
     def get_funding_rate(
         self,
         timestamp: int,
@@ -136,21 +177,37 @@ class FundingRateBacktestDataProvider:
         if self.data is None:
             raise RuntimeError("Data not loaded. Call load_data() first.")
 
-        # Filter for specific exchange and token
-        mask = (
-            (self.data['exchange'] == exchange) &
-            (self.data['base'] == token) &
-            (self.data['timestamp'] <= timestamp)
-        )
+        e = self._exchange_idx.get(exchange)
+        k = self._token_idx.get(token)
+        if e is None or k is None:
+            return None
 
-        matching_data = self.data[mask]
+        return self.get_funding_rate_at(self.time_index_of(timestamp), e, k)
 
-        if matching_data.empty:
+    def time_index_of(self, timestamp: int) -> int:
+        """
+        Index of the latest loaded timestamp at or before `timestamp` (-1 if none).
+
+        Resolve this once per bar and reuse it with the index-based accessors.
+        """
+        return int(np.searchsorted(self._time_index, timestamp, side='right')) - 1
+
+    def get_funding_rate_at(self, time_idx: int, exchange_idx: int, token_idx: int) -> Optional[float]:
+        """
+        Index-based get_funding_rate() for hot loops.
+
+        Args:
+            time_idx: Result of time_index_of()
+            exchange_idx: Position in self.exchanges
+            token_idx: Position in self.tokens
+
+        Returns:
+            Funding rate as float, or None if not available
+        """
+        if time_idx < 0 or not self._has_rate[time_idx, exchange_idx, token_idx]:
             return None
 
-        # Get most recent rate
-        latest_row = matching_data.iloc[-1]
-        return float(latest_row['funding_rate'])
+        return float(self._rates[time_idx, exchange_idx, token_idx])
 
     def get_spread(
         self,
@@ -197,32 +254,43 @@ class FundingRateBacktestDataProvider:
         if self.data is None:
             raise RuntimeError("Data not loaded. Call load_data() first.")
 
-        # Get rates from all exchanges for this token
-        rates = {}
-        for exchange in self.exchanges:
-            rate = self.get_funding_rate(timestamp, exchange, token)
-            if rate is not None:
-                rates[exchange] = rate
-
-        if len(rates) < 2:
+        k = self._token_idx.get(token)
+        if k is None:
             return None
 
-        # Find max spread
-        max_spread = 0
-        best_pair = (None, None)
+        return self.get_best_spread_at(self.time_index_of(timestamp), k)
+
+    def get_best_spread_at(self, time_idx: int, token_idx: int) -> Optional[Tuple[str, str, float]]:
+        """
+        Index-based get_best_spread() for hot loops.
+
+        The largest pairwise spread is max - min over the exchanges that have a rate,
+        so the whole exchange row is reduced at once.
 
-        exchanges_list = list(rates.keys())
-        for i, ex1 in enumerate(exchanges_list):
-            for ex2 in exchanges_list[i+1:]:
-                spread = abs(rates[ex1] - rates[ex2])
-                if spread > max_spread:
-                    max_spread = spread
-                    best_pair = (ex1, ex2)
+        Args:
+            time_idx: Result of time_index_of()
+            token_idx: Position in self.tokens
+
+        Returns:
+            Tuple of (exchange1, exchange2, spread) or None if insufficient data
+        """
+        if time_idx < 0:
+            return None
+
+        rates = self._rates[time_idx, :, token_idx]
+        valid = np.flatnonzero(self._has_rate[time_idx, :, token_idx] & ~np.isnan(rates))
+        if valid.size < 2:
+            return None
 
-        if best_pair[0] is None:
+        hi = valid[np.argmax(rates[valid])]
+        lo = valid[np.argmin(rates[valid])]
+        max_spread = float(rates[hi] - rates[lo])
+        if max_spread <= 0:
             return None
 
-        return (best_pair[0], best_pair[1], max_spread)
+        # Exchanges are reported in self.exchanges order, as before
+        ex1, ex2 = sorted((hi, lo))
+        return (self.exchanges[ex1], self.exchanges[ex2], max_spread)
 
     def get_funding_payment_times(
         self,
@@ -283,7 +351,7 @@ class FundingRateBacktestDataProvider:
                     (self.data['exchange'] == exchange) &
                     (self.data['base'] == token)
                 )
-                pair_data = self.data[mask].copy()
+                pair_data = self.data[mask]
 
                 if pair_data.empty:
                     continue
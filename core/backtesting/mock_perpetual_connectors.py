@@ -9,9 +9,12 @@ Date: 2025-11-04
 """
 
 from decimal import Decimal
-from typing import Optional
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
 from hummingbot.core.data_type.funding_info import FundingInfo
-from hummingbot.core.data_type.common import PositionMode, OrderType, TradeType, PositionAction
+from hummingbot.core.data_type.common import PositionMode, OrderType, PriceType, TradeType, PositionAction
 from hummingbot.core.data_type.trade_fee import TradeFeeSchema
 
 
@@ -22,6 +25,9 @@ class MockPerpetualConnectorBase:
     Provides minimal interface needed by v2_funding_rate_arb strategy.
     """
 
+    # Funding is settled hourly on both venues
+    FUNDING_INTERVAL_SECONDS = 3600
+
     def __init__(self, connector_name: str, data_provider):
         """
         Initialize mock connector.
@@ -35,6 +41,11 @@ class MockPerpetualConnectorBase:
         self._position_mode = PositionMode.ONEWAY
         self._leverage = {}
         self.trading_rules = {}  # Trading rules (populated by backtesting engine)
+        # feed_key -> (source feed, sorted timestamps, funding rates), built on first lookup
+        self._funding_arrays: Dict[str, Tuple[pd.DataFrame, np.ndarray, np.ndarray]] = {}
+        # trading_pair -> FundingInfo for the backtest tick in _funding_info_time
+        self._funding_info_cache: Dict[str, Optional[FundingInfo]] = {}
+        self._funding_info_time = None
 
     def set_position_mode(self, position_mode: PositionMode):
         """Set position mode (ONEWAY or HEDGE)."""
@@ -53,7 +64,13 @@ class MockPerpetualConnectorBase:
         """
         Get historical funding info at current backtest timestamp.
 
-        Delegates to BacktestingDataProvider which has time awareness.
+        Same result as BacktestingDataProvider.get_funding_info (the most recent rate
+        at or before the provider's current time), but found with a binary search over
+        the feed's timestamp array instead of masking the feed DataFrame on every call.
+        Missing feeds and queries before the first record are delegated to the
+        provider, which logs them. Results are memoized per trading pair until the
+        provider's clock moves, since controllers query the same pair several times
+        within one tick.
 
         Args:
             trading_pair: Trading pair (e.g., "KAITO-USD")
@@ -61,10 +78,59 @@ class MockPerpetualConnectorBase:
         Returns:
             FundingInfo object with historical data at current backtest time
         """
-        return self.data_provider.get_funding_info(
-            self.connector_name,
-            trading_pair
+        current_time = self.data_provider._time
+        if current_time != self._funding_info_time:
+            self._funding_info_cache.clear()
+            self._funding_info_time = current_time
+        elif trading_pair in self._funding_info_cache:
+            return self._funding_info_cache[trading_pair]
+
+        funding_info = self._lookup_funding_info(trading_pair, current_time)
+        self._funding_info_cache[trading_pair] = funding_info
+        return funding_info
+
+    def _lookup_funding_info(self, trading_pair: str, current_time) -> Optional[FundingInfo]:
+        """Build the FundingInfo for trading_pair at current_time (uncached)."""
+        arrays = self._get_funding_arrays(f"{self.connector_name}_{trading_pair}")
+        idx = -1
+        if arrays is not None and current_time is not None:
+            _, timestamps, rates = arrays
+            idx = int(np.searchsorted(timestamps, current_time, side='right')) - 1
+
+        if idx < 0:
+            return self.data_provider.get_funding_info(
+                self.connector_name,
+                trading_pair
+            )
+
+        mark_price = self.data_provider.get_price_by_type(
+            self.connector_name, trading_pair, PriceType.MidPrice
         )
+        return FundingInfo(
+            trading_pair=trading_pair,
+            index_price=Decimal(str(mark_price)),
+            mark_price=Decimal(str(mark_price)),
+            next_funding_utc_timestamp=int(timestamps[idx]) + self.FUNDING_INTERVAL_SECONDS,
+            rate=Decimal(str(rates[idx]))
+        )
+
+    def _get_funding_arrays(self, feed_key: str) -> Optional[Tuple[pd.DataFrame, np.ndarray, np.ndarray]]:
+        """Timestamp/rate arrays for a funding feed, rebuilt if the feed object is replaced."""
+        funding_df = self.data_provider.funding_feeds.get(feed_key)
+        if funding_df is None or funding_df.empty:
+            return None
+
+        cached = self._funding_arrays.get(feed_key)
+        if cached is None or cached[0] is not funding_df:
+            timestamps = funding_df['timestamp'].to_numpy()
+            rates = funding_df['funding_rate'].to_numpy()
+            if not funding_df['timestamp'].is_monotonic_increasing:
+                order = np.argsort(timestamps, kind='stable')
+                timestamps, rates = timestamps[order], rates[order]
+            cached = (funding_df, timestamps, rates)
+            self._funding_arrays[feed_key] = cached
+
+        return cached
 
     def get_fee(
         self,
@@ -12,8 +12,9 @@ All concrete implementations must provide:
 - Standardized DataFrame output schema
 """
 
+import random
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import List, Mapping, Optional
 import pandas as pd
 
 
@@ -55,6 +56,15 @@ class BaseFundingDataSource(ABC):
         """
         pass
 
+    async def __aenter__(self):
+        """Context manager entry: start the source and hand it back."""
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit: always release the session."""
+        await self.stop()
+
     @abstractmethod
     async def get_funding_rates(
         self,
@@ -184,6 +194,28 @@ class BaseFundingDataSource(ABC):
 
         return True
 
+    @staticmethod
+    def retry_delay(attempt: int, headers: Optional[Mapping[str, str]] = None) -> float:
+        """
+        Seconds to wait before retrying a failed request.
+
+        Args:
+            attempt: Zero-based index of the attempt that just failed
+            headers: Response headers of the failed request, if any
+
+        Returns:
+            The server's Retry-After value when it sends one in seconds (e.g. on 429),
+            otherwise exponential backoff with jitter so concurrent retries spread out
+        """
+        retry_after = headers.get('Retry-After') if headers else None
+        if retry_after:
+            try:
+                return max(float(retry_after), 0.0)
+            except ValueError:
+                pass  # HTTP-date form; fall back to backoff
+
+        return (2 ** attempt) * (0.5 + random.random())
+
     def __repr__(self) -> str:
         """String representation of the data source."""
         return f"{self.__class__.__name__}()"
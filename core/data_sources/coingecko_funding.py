@@ -17,6 +17,7 @@ import logging
 import time
 from typing import List, Dict, Optional, Tuple, Any
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
 from decimal import Decimal
 
@@ -527,23 +528,31 @@ class CoinGeckoFundingDataSource(BaseFundingDataSource):
         if funding_df.empty:
             return pd.DataFrame()
 
-        # Pivot to get rates by exchange (using 'base' as the token identifier)
+        # Pivot to get rates by exchange (using 'base' as the token identifier).
+        # Rows are put in time order first so multi-snapshot input yields the latest rate.
+        if 'timestamp' in funding_df.columns:
+            funding_df = funding_df.sort_values('timestamp', kind='mergesort')
+
         pivot_df = funding_df.pivot_table(
             index='base',
             columns='exchange',
             values='funding_rate',
-            aggfunc='first'
+            aggfunc='last',
+            observed=True
         )
 
-        spreads = pivot_df.copy()
+        # Calculate all pairwise spreads in one broadcast over the (token x exchange) matrix
         exchanges = pivot_df.columns.tolist()
+        rates = pivot_df.to_numpy(dtype=float)
+        left, right = np.triu_indices(len(exchanges), k=1)
+        pair_spreads = pd.DataFrame(
+            np.abs(rates[:, left] - rates[:, right]),
+            index=pivot_df.index,
+            columns=[f"{exchanges[i]}_{exchanges[j]}_spread" for i, j in zip(left, right)]
+        )
 
-        # Calculate all pairwise spreads
-        for i, ex1 in enumerate(exchanges):
-            for ex2 in exchanges[i+1:]:
-                spread_col = f"{ex1}_{ex2}_spread"
-                spreads[spread_col] = abs(pivot_df[ex1] - pivot_df[ex2])
-
+        spreads = pd.concat([pivot_df, pair_spreads], axis=1)
+        spreads.columns.name = pivot_df.columns.name
         spreads.reset_index(inplace=True)
 
         return spreads
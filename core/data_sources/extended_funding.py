@@ -26,14 +26,21 @@ import time
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
 import pandas as pd
+from aiolimiter import AsyncLimiter
+
+try:
+    import ijson
+except ImportError:  # Optional: stream-parse large responses when available
+    ijson = None
+
+# A malformed or truncated response body (streamed or decoded whole); counted as a failed attempt
+_BODY_PARSE_ERRORS = (aiohttp.ContentTypeError, ValueError) + ((ijson.JSONError,) if ijson is not None else ())
 
 try:
     from .base_funding_source import BaseFundingDataSource
 except ImportError:
     from base_funding_source import BaseFundingDataSource
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
@@ -48,7 +55,8 @@ class ExtendedFundingDataSource(BaseFundingDataSource):
 
     Rate Limits:
     - Unknown (to be determined during testing)
-    - Start with 1-second delays between requests
+    - Concurrent requests are capped at MAX_CONCURRENT_REQUESTS
+    - Request rate is shaped by a token bucket (MAX_REQUESTS_PER_SECOND)
 
     Market Format:
     - Extended uses market IDs like "KAITO-USD", "IP-USDC"
@@ -62,18 +70,37 @@ class ExtendedFundingDataSource(BaseFundingDataSource):
     # These will be populated dynamically via API
     MARKET_MAPPINGS = {}
 
-    def __init__(self, timeout: int = 30, max_retries: int = 3):
+    # Upper bound on in-flight requests when fetching several markets at once
+    MAX_CONCURRENT_REQUESTS = 5
+
+    # Token-bucket budget for requests to the API (requests per second)
+    MAX_REQUESTS_PER_SECOND = 10
+
+    def __init__(
+        self,
+        timeout: int = 30,
+        max_retries: int = 3,
+        max_requests_per_second: Optional[float] = None,
+        max_concurrent_requests: Optional[int] = None
+    ):
         """
         Initialize Extended data source.
 
         Args:
             timeout: Request timeout in seconds
             max_retries: Maximum number of retry attempts for failed requests
+            max_requests_per_second: Request rate cap (defaults to MAX_REQUESTS_PER_SECOND)
+            max_concurrent_requests: In-flight request cap for multi-market fetches
+                                     (defaults to MAX_CONCURRENT_REQUESTS)
         """
         self.timeout = timeout
         self.max_retries = max_retries
         self._session: Optional[aiohttp.ClientSession] = None
         self._markets_fetched = False
+        self.max_concurrent_requests = max_concurrent_requests or self.MAX_CONCURRENT_REQUESTS
+        self._request_semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        self.max_requests_per_second = max_requests_per_second or self.MAX_REQUESTS_PER_SECOND
+        self._rate_limiter = AsyncLimiter(max_rate=self.max_requests_per_second, time_period=1)
 
     async def start(self) -> None:
         """Initialize HTTP session and fetch available markets."""
@@ -82,7 +109,14 @@ class ExtendedFundingDataSource(BaseFundingDataSource):
             headers = {
                 'User-Agent': 'backtest'  # Required by Extended API
             }
-            self._session = aiohttp.ClientSession(timeout=timeout, headers=headers)
+            # One long-lived keep-alive pool shared by every request this source makes
+            connector = aiohttp.TCPConnector(
+                limit=128,
+                limit_per_host=32,
+                ttl_dns_cache=300,
+                keepalive_timeout=75
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers)
             logger.info("Extended data source session started")
 
             # Fetch available markets
@@ -93,6 +127,8 @@ class ExtendedFundingDataSource(BaseFundingDataSource):
         if self._session:
             await self._session.close()
             self._session = None
+            # Give SSL transports a moment to finish closing before the loop shuts down
+            await asyncio.sleep(0.1)
             logger.info("Extended data source session closed")
 
     async def _fetch_markets(self) -> None:
@@ -153,6 +189,24 @@ class ExtendedFundingDataSource(BaseFundingDataSource):
         # Default to standard format
         return f"{token}-{quote}"
 
+    async def _iter_funding_items(self, response: aiohttp.ClientResponse):
+        """
+        Yield funding records from a /funding response one at a time.
+
+        With ijson installed the body is parsed incrementally from the response
+        stream, so a 10k-record page is never materialized as a full dict tree.
+        Otherwise falls back to decoding the whole body with response.json().
+        """
+        if ijson is not None:
+            async for item in ijson.items_async(response.content, 'data.item'):
+                yield item
+            return
+
+        json_response = await response.json()
+        if isinstance(json_response, dict) and isinstance(json_response.get('data'), list):
+            for item in json_response['data']:
+                yield item
+
     async def get_historical_funding_rates(
         self,
         market: str,
@@ -200,54 +254,62 @@ class ExtendedFundingDataSource(BaseFundingDataSource):
 
         for attempt in range(self.max_retries):
             try:
-                async with self._session.get(url, params=params) as response:
+                async with self._rate_limiter, self._session.get(url, params=params) as response:
                     response.raise_for_status()
-                    json_response = await response.json()
-
-                    # Parse response - Extended returns {"status": "OK", "data": [...]}
-                    records = []
-
-                    if isinstance(json_response, dict) and 'data' in json_response:
-                        data = json_response['data']
-
-                        if isinstance(data, list):
-                            for item in data:
-                                # API returns: m (market), T (timestamp in ms), f (funding rate as string)
-                                market_name = item.get('m', market)
-
-                                # Extract market components (e.g., "KAITO-USD" -> "KAITO", "USD")
-                                parts = market_name.split('-')
-                                base = parts[0] if len(parts) > 0 else 'UNKNOWN'
-                                target = parts[1] if len(parts) > 1 else 'USD'
-
-                                # Convert timestamp from milliseconds to seconds
-                                timestamp_ms = item.get('T', 0)
-                                timestamp_sec = int(timestamp_ms / 1000) if timestamp_ms else 0
-
-                                # Parse funding rate (comes as string)
-                                funding_rate_str = item.get('f', '0')
-                                funding_rate = float(funding_rate_str) if funding_rate_str else 0.0
-
-                                records.append({
-                                    'timestamp': timestamp_sec,
-                                    'exchange': self.EXCHANGE_ID,
-                                    'base': base,
-                                    'target': target,
-                                    'funding_rate': funding_rate,
-                                })
-
-                    df = pd.DataFrame(records)
-                    logger.info(f"Fetched {len(df)} historical records for {market}")
+
+                    # Parse response column-wise - Extended returns {"status": "OK", "data": [...]}
+                    timestamps, bases, targets, funding_rates = [], [], [], []
+
+                    # Market components (e.g., "KAITO-USD" -> "KAITO", "USD"); items almost
+                    # always echo the requested market, so split it once up front
+                    default_base, _, default_target = market.partition('-')
+                    default_target = default_target or 'USD'
+
+                    async for item in self._iter_funding_items(response):
+                        # API returns: m (market), T (timestamp in ms), f (funding rate as string)
+                        market_name = item.get('m')
+                        if market_name is None or market_name == market:
+                            base, target = default_base, default_target
+                        else:
+                            base, _, target = market_name.partition('-')
+                            target = target or 'USD'
+                        bases.append(base)
+                        targets.append(target)
+
+                        # Convert timestamp from milliseconds to seconds
+                        timestamp_ms = item.get('T', 0)
+                        timestamps.append(int(timestamp_ms / 1000) if timestamp_ms else 0)
+
+                        # Parse funding rate (comes as string)
+                        funding_rate_str = item.get('f', '0')
+                        funding_rates.append(float(funding_rate_str) if funding_rate_str else 0.0)
+
+                    df = pd.DataFrame({
+                        'timestamp': timestamps,
+                        'exchange': self.EXCHANGE_ID,
+                        'base': bases,
+                        'target': targets,
+                        'funding_rate': funding_rates,
+                    })
+                    logger.info("Fetched %d historical records for %s", len(df), market)
                     return df
 
-            except aiohttp.ClientError as e:
-                logger.warning(f"Attempt {attempt + 1}/{self.max_retries} failed for {market}: {e}")
-                if attempt < self.max_retries - 1:
-                    await asyncio.sleep(2 ** attempt)  # Exponential backoff
-                else:
-                    logger.error(f"Failed to fetch historical data for {market} after {self.max_retries} attempts")
+            except _BODY_PARSE_ERRORS as e:
+                error, headers = e, None
+            except aiohttp.ClientResponseError as e:
+                # 429 and 5xx are transient; any other client error won't succeed on retry
+                if e.status != 429 and e.status < 500:
+                    logger.error("Request for %s rejected (%d): %s", market, e.status, e.message)
                     return pd.DataFrame()
+                error, headers = e, e.headers
+            except aiohttp.ClientError as e:
+                error, headers = e, None
 
+            logger.warning("Attempt %d/%d failed for %s: %s", attempt + 1, self.max_retries, market, error)
+            if attempt < self.max_retries - 1:
+                await asyncio.sleep(self.retry_delay(attempt, headers))
+
+        logger.error("Failed to fetch historical data for %s after %d attempts", market, self.max_retries)
         return pd.DataFrame()
 
     async def get_funding_rates(
@@ -280,17 +342,22 @@ class ExtendedFundingDataSource(BaseFundingDataSource):
         end_time = int(time.time() * 1000)
         start_time = end_time - (3600 * 1000)  # 1 hour ago in milliseconds
 
-        all_data = []
+        tokens = tokens or []
 
-        for token in (tokens or []):
+        async def fetch_latest(token: str) -> pd.DataFrame:
             market = self._get_market_id(token)
-            df = await self.get_historical_funding_rates(market, start_time, end_time, limit=1)
+            async with self._request_semaphore:
+                return await self.get_historical_funding_rates(market, start_time, end_time, limit=1)
 
-            if not df.empty:
-                all_data.append(df)
+        # Fan out across markets; the semaphore bounds concurrency instead of fixed sleeps
+        results = await asyncio.gather(*(fetch_latest(token) for token in tokens), return_exceptions=True)
 
-            # Rate limiting
-            await asyncio.sleep(0.5)
+        all_data = []
+        for token, result in zip(tokens, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Failed to fetch funding rate for {token}: {result}")
+            elif not result.empty:
+                all_data.append(result)
 
         if all_data:
             return pd.concat(all_data, ignore_index=True)
@@ -353,41 +420,47 @@ class ExtendedFundingDataSource(BaseFundingDataSource):
         end_time = int(time.time() * 1000)
         start_time = end_time - (days * 24 * 3600 * 1000)
 
-        logger.info(f"Starting bulk download: {len(tokens)} tokens, {days} days")
-        logger.info(f"Time range: {datetime.fromtimestamp(start_time/1000)} to {datetime.fromtimestamp(end_time/1000)}")
-
-        all_data = []
+        logger.info("Starting bulk download: %d tokens, %d days (%d concurrent)", len(tokens), days, self.max_concurrent_requests)
+        logger.info("Time range: %s to %s", datetime.fromtimestamp(start_time / 1000), datetime.fromtimestamp(end_time / 1000))
 
-        for i, token in enumerate(tokens, 1):
+        async def download(token: str) -> pd.DataFrame:
             market = self._get_market_id(token, quote)
+            async with self._request_semaphore:
+                logger.info("Downloading %s...", market)
+                return await self.get_historical_funding_rates(
+                    market=market,
+                    start_time=start_time,
+                    end_time=end_time,
+                    limit=10000
+                )
+
+        # Tokens download concurrently, bounded by the semaphore and paced by the rate limiter
+        results = await asyncio.gather(*(download(token) for token in tokens), return_exceptions=True)
 
-            logger.info(f"[{i}/{len(tokens)}] Downloading {market}...")
-
-            df = await self.get_historical_funding_rates(
-                market=market,
-                start_time=start_time,
-                end_time=end_time,
-                limit=10000
-            )
-
-            if not df.empty:
-                all_data.append(df)
-                logger.info(f"  ✅ Downloaded {len(df)} records for {market}")
+        all_data = []
+        for i, (token, result) in enumerate(zip(tokens, results), 1):
+            if isinstance(result, Exception):
+                logger.warning("  [%d/%d] ⚠️  Failed to download %s: %s", i, len(tokens), token, result)
+            elif not result.empty:
+                all_data.append(result)
+                logger.info("  [%d/%d] ✅ Downloaded %d records for %s", i, len(tokens), len(result), token)
             else:
-                logger.warning(f"  ⚠️  No data returned for {market}")
-
-            # Rate limiting between tokens
-            if i < len(tokens):
-                await asyncio.sleep(1)
+                logger.warning("  [%d/%d] ⚠️  No data returned for %s", i, len(tokens), token)
 
         if all_data:
-            combined_df = pd.concat(all_data, ignore_index=True)
-            combined_df = combined_df.sort_values('timestamp')
+            # One concat over the collected per-token frames, then a single stable sort
+            # (per-token row order survives for equal timestamps, index stays 0..N-1)
+            combined_df = pd.concat(all_data, ignore_index=True).sort_values(
+                'timestamp', kind='stable', ignore_index=True
+            )
 
-            logger.info(f"✅ Bulk download complete: {len(combined_df)} total records")
-            # Timestamps are already in seconds in the dataframe
-            logger.info(f"   Date range: {datetime.fromtimestamp(combined_df['timestamp'].min())} to {datetime.fromtimestamp(combined_df['timestamp'].max())}")
-            logger.info(f"   Tokens: {combined_df['base'].nunique()} ({', '.join(sorted(combined_df['base'].unique()))})")
+            logger.info("✅ Bulk download complete: %d total records", len(combined_df))
+            if logger.isEnabledFor(logging.INFO):
+                # Timestamps are already in seconds in the dataframe
+                logger.info("   Date range: %s to %s",
+                            datetime.fromtimestamp(combined_df['timestamp'].iat[0]),
+                            datetime.fromtimestamp(combined_df['timestamp'].iat[-1]))
+                logger.info("   Tokens: %d (%s)", combined_df['base'].nunique(), ', '.join(sorted(combined_df['base'].unique())))
 
             return combined_df
 
@@ -414,10 +487,12 @@ class ExtendedFundingDataSource(BaseFundingDataSource):
         if not self._markets_fetched:
             await self._fetch_markets()
 
-        valid_tokens = [
-            token for token in tokens
-            if token in self.MARKET_MAPPINGS or True  # Allow all for now
-        ]
+        mapping = self.MARKET_MAPPINGS
+        valid_tokens = [token for token in tokens if token in mapping]
+
+        if len(valid_tokens) < len(tokens):
+            invalid = [t for t in tokens if t not in mapping]
+            logger.warning(f"Tokens not found on Extended: {invalid}")
 
         return valid_tokens
 
@@ -10,19 +10,25 @@ Reference: FUNDING_RATE_ARB_BACKTEST_PLAN.md - Component 2
 """
 
 import asyncio
+import copy
 import logging
 import json
+import os
 import time
 from pathlib import Path
 from typing import List, Optional, Dict
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
 
+try:
+    import orjson
+except ImportError:  # Optional: faster metadata (de)serialization
+    orjson = None
+
 from core.data_sources.base_funding_source import BaseFundingDataSource
 from core.data_sources.coingecko_funding import CoinGeckoFundingDataSource
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
@@ -110,6 +116,10 @@ class FundingRateCollector:
         self.collection_start_time: Optional[float] = None
         self.snapshots_collected: int = 0
         self.is_collecting: bool = False
+        self._stop_event = asyncio.Event()  # Set by stop_collection() to cut the interval wait short
+
+        # Parsed metadata is kept in memory; the file is only read once here
+        self._metadata_cache: Dict = self._read_metadata()
 
         logger.info(f"FundingRateCollector initialized")
         logger.info(f"  Exchanges: {', '.join(self.exchanges)}")
@@ -169,20 +179,37 @@ class FundingRateCollector:
                 combined_df = pd.concat([existing_df, data], ignore_index=True)
 
                 # Remove duplicates (same timestamp + exchange + base)
-                combined_df = combined_df.drop_duplicates(
-                    subset=['timestamp', 'exchange', 'base'],
-                    keep='last'
-                )
+                combined_df = combined_df[~self._duplicated_snapshot_keys(combined_df)]
 
                 combined_df.to_parquet(filename, index=False)
-                logger.info(f"✅ Appended to {filename} ({len(data)} new rows)")
+                logger.info("✅ Appended to %s (%d new rows)", filename, len(data))
             else:
                 # Save new file
                 data.to_parquet(filename, index=False)
-                logger.info(f"✅ Saved to {filename} ({len(data)} rows)")
+                logger.info("✅ Saved to %s (%d rows)", filename, len(data))
 
         except Exception as e:
-            logger.error(f"Failed to save snapshot: {e}")
+            logger.error("Failed to save snapshot: %s", e)
+
+    @staticmethod
+    def _duplicated_snapshot_keys(data: pd.DataFrame) -> np.ndarray:
+        """
+        Flag rows whose (timestamp, exchange, base) key reappears later in the frame.
+
+        Each distinct key is numbered once with groupby.ngroup (missing labels form
+        their own groups), so deduplication compares one integer per row.
+
+        Args:
+            data: DataFrame with timestamp, exchange and base columns
+
+        Returns:
+            Boolean mask, True for every row superseded by a later duplicate
+        """
+        group_ids = data.groupby(
+            ['timestamp', 'exchange', 'base'], dropna=False, observed=True, sort=False
+        ).ngroup()
+
+        return group_ids.duplicated(keep='last').to_numpy()
 
     async def start_collection(
         self,
@@ -207,17 +234,23 @@ class FundingRateCollector:
         logger.info("=" * 70)
 
         self.is_collecting = True
+        self._stop_event.clear()
         self.collection_start_time = time.time()
         start_time = self.collection_start_time
 
+        # Schedule against the monotonic clock so wall-clock jumps don't shift ticks
+        start_monotonic = time.monotonic()
+        interval_seconds = interval_minutes * 60
+
         # Calculate end time if duration specified
-        end_time = start_time + (duration_hours * 3600) if duration_hours else None
+        end_time = start_monotonic + (duration_hours * 3600) if duration_hours else None
 
         try:
             # Start CoinGecko session
             await self.cg_source.start()
 
             snapshot_count = 0
+            tick = 0
 
             while self.is_collecting:
                 # Collect snapshot
@@ -234,17 +267,22 @@ class FundingRateCollector:
                     logger.info(f"✅ Reached max snapshots ({max_snapshots})")
                     break
 
-                if end_time and time.time() >= end_time:
+                if end_time and time.monotonic() >= end_time:
                     logger.info(f"✅ Reached duration limit ({duration_hours} hours)")
                     break
 
-                # Wait for next interval
-                next_collection_time = time.time() + (interval_minutes * 60)
-                wait_seconds = next_collection_time - time.time()
+                # Wait for next interval, anchored to the collection start so the
+                # snapshot's own duration doesn't accumulate as drift
+                tick += 1
+                next_tick = start_monotonic + tick * interval_seconds
+                wait_seconds = next_tick - time.monotonic()
 
                 if wait_seconds > 0:
                     logger.info(f"⏳ Waiting {wait_seconds/60:.1f} minutes until next snapshot...")
-                    await asyncio.sleep(wait_seconds)
+                    try:
+                        await asyncio.wait_for(self._stop_event.wait(), timeout=wait_seconds)
+                    except asyncio.TimeoutError:
+                        pass  # Deadline reached - time for the next snapshot
 
         except KeyboardInterrupt:
             logger.info("\n⚠️  Collection interrupted by user")
@@ -274,6 +312,7 @@ class FundingRateCollector:
         """Stop the collection process."""
         logger.info("Stopping collection...")
         self.is_collecting = False
+        self._stop_event.set()
 
     def load_historical_data(
         self,
@@ -350,18 +389,22 @@ class FundingRateCollector:
         if data.empty:
             return {"valid": False, "reason": "Empty dataset"}
 
+        # One pass over the frame for per-column null counts; derive everything else from it
+        nulls = data.isna().sum()
+        ts_range = data['timestamp'].agg(['min', 'max'])
+
         metrics = {
             "valid": True,
             "total_records": len(data),
             "exchanges": data['exchange'].nunique(),
             "tokens": data['base'].nunique(),
             "date_range": {
-                "start": datetime.fromtimestamp(data['timestamp'].min()).isoformat(),
-                "end": datetime.fromtimestamp(data['timestamp'].max()).isoformat()
+                "start": datetime.fromtimestamp(ts_range['min']).isoformat(),
+                "end": datetime.fromtimestamp(ts_range['max']).isoformat()
             },
-            "null_funding_rates": data['funding_rate'].isna().sum(),
-            "null_prices": data['index'].isna().sum(),
-            "completeness": 1.0 - (data.isna().sum().sum() / (len(data) * len(data.columns)))
+            "null_funding_rates": int(nulls.get('funding_rate', 0)),
+            "null_prices": int(nulls.get('index', 0)),
+            "completeness": 1.0 - (int(nulls.sum()) / (len(data) * data.shape[1]))
         }
 
         return metrics
@@ -378,17 +421,44 @@ class FundingRateCollector:
                 "storage_path": str(self.storage_path)
             }
 
-            with open(self.metadata_path, 'w') as f:
-                json.dump(metadata, f, indent=2)
+            self._write_metadata(metadata)
+            self._metadata_cache = metadata
 
             logger.info(f"✅ Metadata updated: {self.metadata_path}")
 
         except Exception as e:
             logger.error(f"Failed to update metadata: {e}")
 
+    def _read_metadata(self) -> Dict:
+        """Read collection metadata from disk, or an empty dict if none exists."""
+        if not self.metadata_path.exists():
+            return {}
+
+        try:
+            raw = self.metadata_path.read_bytes()
+            return orjson.loads(raw) if orjson is not None else json.loads(raw)
+        except (OSError, ValueError) as e:
+            # e.g. a truncated file from an older non-atomic write; the next
+            # metadata update overwrites it
+            logger.warning(f"Ignoring unreadable metadata {self.metadata_path}: {e}")
+            return {}
+
+    def _write_metadata(self, metadata: Dict) -> None:
+        """
+        Write metadata atomically.
+
+        The payload goes to a temp file that is then renamed over the real one,
+        so a process killed mid-write never leaves a truncated metadata.json.
+        """
+        if orjson is not None:
+            payload = orjson.dumps(metadata, option=orjson.OPT_INDENT_2)
+        else:
+            payload = json.dumps(metadata, indent=2).encode()
+
+        tmp_path = self.metadata_path.with_suffix('.tmp')
+        tmp_path.write_bytes(payload)
+        os.replace(tmp_path, self.metadata_path)
+
     def get_metadata(self) -> Dict:
-        """Load and return collection metadata."""
-        if self.metadata_path.exists():
-            with open(self.metadata_path, 'r') as f:
-                return json.load(f)
-        return {}
+        """Return collection metadata (a copy; the cached dict stays internal)."""
+        return copy.deepcopy(self._metadata_cache)
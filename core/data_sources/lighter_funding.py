@@ -19,11 +19,35 @@ Date: 2025-11-04
 
 import asyncio
 import aiohttp
+import json
 import logging
+import os
+import tempfile
 import time
+from pathlib import Path
 from typing import List, Dict, Optional
 from datetime import datetime
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+from aiolimiter import AsyncLimiter
+from yarl import URL
+
+from core.data_paths import data_paths
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # Optional: C JSON decoder for large responses
+    _json_loads = json.loads
+
+try:
+    import ijson
+except ImportError:  # Optional: stream-parse large responses when available
+    ijson = None
+
+# A malformed or truncated response body (streamed or decoded whole); counted as a failed attempt
+_BODY_PARSE_ERRORS = (aiohttp.ContentTypeError, ValueError) + ((ijson.JSONError,) if ijson is not None else ())
 
 try:
     from .base_funding_source import BaseFundingDataSource
@@ -47,6 +71,10 @@ class LighterFundingDataSource(BaseFundingDataSource):
     Market Format:
     - Lighter uses market IDs (integers) like 33 for KAITO
     - Need to map token symbols to market IDs via /orderBooks endpoint
+
+    Connection Reuse:
+    - One pooled keep-alive session lives from start() to stop(); reuse the same
+      instance across batches rather than creating a new source per download
     """
 
     BASE_URL = "https://mainnet.zklighter.elliot.ai"
@@ -56,24 +84,57 @@ class LighterFundingDataSource(BaseFundingDataSource):
     # These will be populated dynamically via API
     MARKET_MAPPINGS = {}  # e.g., {'KAITO': 33, 'IP': 34}
 
-    def __init__(self, timeout: int = 30, max_retries: int = 3):
+    # Upper bound on in-flight requests when fetching several markets at once
+    MAX_CONCURRENT_REQUESTS = 8
+
+    # Token-bucket budget for requests to the API (requests per second)
+    MAX_REQUESTS_PER_SECOND = 10
+
+    # On-disk copy of the symbol -> market ID mapping, reused until it is older than the TTL
+    DEFAULT_MARKETS_CACHE_PATH = (
+        data_paths.base_path / 'app' / 'data' / 'cache' / 'funding' / 'lighter_markets.json'
+    )
+    MARKETS_CACHE_TTL = 24 * 3600  # seconds
+
+    def __init__(
+        self,
+        timeout: int = 30,
+        max_retries: int = 3,
+        markets_cache_path: Optional[str] = None,
+        max_requests_per_second: Optional[float] = None
+    ):
         """
         Initialize Lighter data source.
 
         Args:
             timeout: Request timeout in seconds
             max_retries: Maximum number of retry attempts for failed requests
+            markets_cache_path: Where to cache the market mapping (defaults to app/data/cache/funding)
+            max_requests_per_second: Request rate cap (defaults to MAX_REQUESTS_PER_SECOND)
         """
         self.timeout = timeout
         self.max_retries = max_retries
+        self.markets_cache_path = Path(markets_cache_path) if markets_cache_path else self.DEFAULT_MARKETS_CACHE_PATH
         self._session: Optional[aiohttp.ClientSession] = None
         self._markets_fetched = False
+        self._reverse_mappings: Dict[int, str] = {}  # market ID -> token symbol
+        self._request_semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_REQUESTS)
+        self.max_requests_per_second = max_requests_per_second or self.MAX_REQUESTS_PER_SECOND
+        self._rate_limiter = AsyncLimiter(max_rate=self.max_requests_per_second, time_period=1)
 
     async def start(self) -> None:
         """Initialize HTTP session and fetch available markets."""
         if self._session is None:
-            timeout = aiohttp.ClientTimeout(total=self.timeout)
-            self._session = aiohttp.ClientSession(timeout=timeout)
+            # Separate connect/read budgets so a stalled socket fails fast instead of eating the total
+            timeout = aiohttp.ClientTimeout(total=self.timeout, connect=5, sock_read=15)
+            # One long-lived keep-alive pool shared by every request this source makes
+            connector = aiohttp.TCPConnector(
+                limit=128,
+                limit_per_host=32,
+                ttl_dns_cache=300,
+                keepalive_timeout=75
+            )
+            self._session = aiohttp.ClientSession(timeout=timeout, connector=connector)
             logger.info("Lighter data source session started")
 
             # Fetch available markets
@@ -84,6 +145,8 @@ class LighterFundingDataSource(BaseFundingDataSource):
         if self._session:
             await self._session.close()
             self._session = None
+            # Give SSL transports a moment to finish closing before the loop shuts down
+            await asyncio.sleep(0.1)
             logger.info("Lighter data source session closed")
 
     async def _fetch_markets(self) -> None:
@@ -96,18 +159,22 @@ class LighterFundingDataSource(BaseFundingDataSource):
         if self._markets_fetched:
             return
 
+        if self._load_markets_cache():
+            return
+
         url = f"{self.BASE_URL}/api/v1/orderBooks"
 
         try:
             async with self._session.get(url) as response:
                 response.raise_for_status()
-                json_response = await response.json()
+                json_response = await response.json(loads=_json_loads)
 
                 # Parse response - Lighter returns {"code": 200, "order_books": [...]}
                 if isinstance(json_response, dict) and 'order_books' in json_response:
                     order_books = json_response['order_books']
 
                     if isinstance(order_books, list):
+                        self._reverse_mappings.clear()
                         for book in order_books:
                             symbol = book.get('symbol', '').upper()
                             market_id = book.get('market_id')
@@ -115,10 +182,12 @@ class LighterFundingDataSource(BaseFundingDataSource):
 
                             if symbol and market_id is not None:
                                 self.MARKET_MAPPINGS[symbol] = market_id
+                                self._reverse_mappings[market_id] = symbol
                                 logger.debug(f"Market: {symbol} -> {market_id} ({status})")
 
                         logger.info(f"Fetched {len(self.MARKET_MAPPINGS)} markets from Lighter")
                         self._markets_fetched = True
+                        self._save_markets_cache()
                     else:
                         logger.warning(f"Unexpected order_books data type: {type(order_books)}")
                 else:
@@ -128,6 +197,39 @@ class LighterFundingDataSource(BaseFundingDataSource):
             logger.error(f"Failed to fetch markets from Lighter: {e}")
             # Continue anyway - we can still work with manual market IDs
 
+    def _load_markets_cache(self) -> bool:
+        """
+        Populate market mappings from the on-disk cache if it is fresh.
+
+        Returns:
+            True if the mappings were loaded, False if the cache is missing, stale or unreadable
+        """
+        cache = self.markets_cache_path
+        try:
+            if not cache.exists() or time.time() - cache.stat().st_mtime >= self.MARKETS_CACHE_TTL:
+                return False
+            mappings = _json_loads(cache.read_bytes())
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable Lighter markets cache {cache}: {e}")
+            return False
+
+        self.MARKET_MAPPINGS.update(mappings)
+        self._reverse_mappings = {market_id: symbol for symbol, market_id in mappings.items()}
+        self._markets_fetched = True
+        logger.info(f"Loaded {len(mappings)} Lighter markets from cache")
+        return True
+
+    def _save_markets_cache(self) -> None:
+        """Write the current market mappings to the on-disk cache atomically."""
+        cache = self.markets_cache_path
+        try:
+            cache.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache.with_suffix('.tmp')
+            tmp_path.write_text(json.dumps(self.MARKET_MAPPINGS))
+            os.replace(tmp_path, cache)
+        except OSError as e:
+            logger.warning(f"Could not write Lighter markets cache {cache}: {e}")
+
     def _get_market_id(self, token: str) -> Optional[int]:
         """
         Get market ID for a token.
@@ -140,6 +242,24 @@ class LighterFundingDataSource(BaseFundingDataSource):
         """
         return self.MARKET_MAPPINGS.get(token.upper())
 
+    async def _iter_funding_items(self, response: aiohttp.ClientResponse):
+        """
+        Yield funding records from a /fundings response one at a time.
+
+        With ijson installed the body is parsed incrementally from the response
+        stream, keeping memory flat for long (90-day) ranges. Otherwise the whole
+        body is decoded at once and its 'fundings' list iterated.
+        """
+        if ijson is not None:
+            async for item in ijson.items_async(response.content, 'fundings.item'):
+                yield item
+            return
+
+        json_response = await response.json(loads=_json_loads)
+        if isinstance(json_response, dict) and isinstance(json_response.get('fundings'), list):
+            for item in json_response['fundings']:
+                yield item
+
     async def get_historical_funding_rates(
         self,
         market_id: int,
@@ -157,7 +277,9 @@ class LighterFundingDataSource(BaseFundingDataSource):
             resolution: Time resolution (default "1h" for hourly)
 
         Returns:
-            DataFrame with columns: timestamp, exchange, base, target, funding_rate
+            DataFrame with columns: timestamp, exchange, base, target, funding_rate.
+            funding_rate is float32: the API reports at most ~6 significant digits
+            (e.g. "0.00006") and float32 keeps ~7, so nothing is lost at half the size.
 
         API Endpoint:
             GET /api/v1/fundings?market_id={id}&resolution={res}&start_timestamp={start}&end_timestamp={end}&count_back={count}
@@ -189,75 +311,163 @@ class LighterFundingDataSource(BaseFundingDataSource):
         else:
             count_back = 1000  # default
 
-        url = f"{self.BASE_URL}/api/v1/fundings"
-        params = {
+        # Encode the URL + query once; every retry attempt reuses it as-is
+        request_url = URL(f"{self.BASE_URL}/api/v1/fundings").with_query({
             "market_id": market_id,
             "resolution": resolution,
             "start_timestamp": start_time,
             "end_timestamp": end_time,
             "count_back": count_back
-        }
+        })
 
         for attempt in range(self.max_retries):
             try:
-                async with self._session.get(url, params=params) as response:
+                async with self._rate_limiter:
+                    response = await asyncio.wait_for(self._session.get(request_url), timeout=self.timeout)
+                async with response:
                     response.raise_for_status()
-                    json_response = await response.json()
-
-                    # Parse response - Lighter returns {"code": 200, "fundings": [...]}
-                    records = []
-
-                    if isinstance(json_response, dict) and 'fundings' in json_response:
-                        fundings = json_response['fundings']
-
-                        if isinstance(fundings, list):
-                            for item in fundings:
-                                # API returns: timestamp, value, rate, direction
-                                timestamp = item.get('timestamp', 0)
-                                value_str = item.get('value', '0')
-                                rate_str = item.get('rate', '0')
-                                direction = item.get('direction', '')
-
-                                # Convert funding rate from string to float
-                                # Use 'value' field as the funding rate
-                                funding_rate = float(value_str) if value_str else 0.0
-
-                                # Apply direction: short = positive (you pay), long = negative (you receive)
-                                # Actually, need to verify this - for now keep as-is
-                                if direction == "long":
-                                    funding_rate = -funding_rate
-
-                                # We don't know the token symbol from the response,
-                                # so we'll need to get it from the market_id mapping
-                                # For now, use placeholder
-                                base = "UNKNOWN"
-                                for symbol, mid in self.MARKET_MAPPINGS.items():
-                                    if mid == market_id:
-                                        base = symbol
-                                        break
-
-                                records.append({
-                                    'timestamp': int(timestamp),
-                                    'exchange': self.EXCHANGE_ID,
-                                    'base': base,
-                                    'target': 'USD',  # Lighter uses USD for all markets
-                                    'funding_rate': funding_rate,
-                                })
-
-                    df = pd.DataFrame(records)
+
+                    # The response doesn't carry the token symbol, so resolve it from the market ID
+                    base = self._reverse_mappings.get(market_id, "UNKNOWN")
+
+                    # Fill typed columns directly instead of building a dict per record.
+                    # count_back is the expected record count, so it sizes the buffers up front.
+                    capacity = max(count_back, 1)
+                    timestamps = np.empty(capacity, dtype=np.int64)
+                    funding_rates = np.empty(capacity, dtype=np.float32)
+                    n = 0
+
+                    async for item in self._iter_funding_items(response):
+                        if n == capacity:
+                            capacity *= 2
+                            timestamps = np.resize(timestamps, capacity)
+                            funding_rates = np.resize(funding_rates, capacity)
+
+                        # API returns: timestamp, value, rate, direction
+                        timestamps[n] = int(item.get('timestamp', 0))
+
+                        # Use 'value' field as the funding rate (comes as string)
+                        value_str = item.get('value', '0')
+                        funding_rate = float(value_str) if value_str else 0.0
+
+                        # Apply direction: short = positive (you pay), long = negative (you receive)
+                        # Actually, need to verify this - for now keep as-is
+                        funding_rates[n] = -funding_rate if item.get('direction', '') == "long" else funding_rate
+                        n += 1
+
+                    df = pd.DataFrame({
+                        'timestamp': timestamps[:n],
+                        'exchange': self.EXCHANGE_ID,
+                        'base': base,
+                        'target': 'USD',  # Lighter uses USD for all markets
+                        'funding_rate': funding_rates[:n],
+                    })
                     logger.info(f"Fetched {len(df)} historical records for market_id {market_id}")
                     return df
 
-            except aiohttp.ClientError as e:
-                logger.warning(f"Attempt {attempt + 1}/{self.max_retries} failed for market_id {market_id}: {e}")
-                if attempt < self.max_retries - 1:
-                    await asyncio.sleep(2 ** attempt)  # Exponential backoff
-                else:
-                    logger.error(f"Failed to fetch historical data for market_id {market_id} after {self.max_retries} attempts")
+            except _BODY_PARSE_ERRORS as e:
+                error, headers = e, None
+            except aiohttp.ClientResponseError as e:
+                # Other client errors (4xx) won't succeed on retry; 429 and 5xx are transient
+                if e.status != 429 and e.status < 500:
+                    logger.error(f"Request for market_id {market_id} rejected ({e.status}): {e.message}")
                     return pd.DataFrame()
+                error, headers = e, e.headers
+            except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+                # Dropped/refused connections and truncated bodies are transient
+                error, headers = e, None
+            except aiohttp.ClientError as e:
+                logger.error(f"Failed to fetch historical data for market_id {market_id}: {e}")
+                return pd.DataFrame()
+
+            logger.warning(f"Attempt {attempt + 1}/{self.max_retries} failed for market_id {market_id}: {error!r}")
+            if attempt < self.max_retries - 1:
+                # Server's Retry-After if given, else jittered backoff so retries don't fire in lockstep
+                await asyncio.sleep(self.retry_delay(attempt, headers))
 
+        logger.error(f"Failed to fetch historical data for market_id {market_id} after {self.max_retries} attempts")
         return pd.DataFrame()
 
+    async def _gather_historical(
+        self,
+        markets: Dict[str, int],
+        start_time: int,
+        end_time: int,
+        resolution: str
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Fetch historical funding rates for several markets concurrently.
+
+        Requests run under the shared semaphore, so at most MAX_CONCURRENT_REQUESTS
+        are in flight. A failure for one token is logged and mapped to an empty
+        DataFrame instead of aborting the whole batch.
+
+        Args:
+            markets: Mapping of token symbol -> market ID
+            start_time: Start timestamp (Unix seconds)
+            end_time: End timestamp (Unix seconds)
+            resolution: Time resolution (e.g., "1h")
+
+        Returns:
+            Dict of token symbol -> DataFrame, in the order of `markets`
+        """
+        async def fetch(market_id: int) -> pd.DataFrame:
+            async with self._request_semaphore:
+                return await self.get_historical_funding_rates(market_id, start_time, end_time, resolution=resolution)
+
+        results = await asyncio.gather(*(fetch(mid) for mid in markets.values()), return_exceptions=True)
+
+        frames = {}
+        for token, result in zip(markets, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Failed to fetch funding rates for {token}: {result}")
+                result = pd.DataFrame()
+            frames[token] = result
+        return frames
+
+    async def _stream_historical(
+        self,
+        markets: Dict[str, int],
+        start_time: int,
+        end_time: int,
+        resolution: str,
+        queue_size: int = 4
+    ):
+        """
+        Yield (token, DataFrame) pairs as each market's download completes.
+
+        Lighter's /fundings endpoint takes a single market_id, so there is no batch
+        request to coalesce into. Instead one producer per market fetches under the
+        shared semaphore and hands its frame to a bounded queue, letting the caller
+        consume finished markets while the rest are still in flight.
+
+        Args:
+            markets: Mapping of token symbol -> market ID
+            start_time: Start timestamp (Unix seconds)
+            end_time: End timestamp (Unix seconds)
+            resolution: Time resolution (e.g., "1h")
+            queue_size: Maximum number of finished frames waiting to be consumed
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+        async def produce(token: str, market_id: int) -> None:
+            try:
+                async with self._request_semaphore:
+                    df = await self.get_historical_funding_rates(market_id, start_time, end_time, resolution=resolution)
+            except Exception as e:
+                logger.warning(f"Failed to fetch funding rates for {token}: {e}")
+                df = pd.DataFrame()
+            # Enqueue outside the semaphore so a full queue doesn't hold a request slot
+            await queue.put((token, df))
+
+        producers = [asyncio.create_task(produce(token, mid)) for token, mid in markets.items()]
+        try:
+            for _ in range(len(producers)):
+                yield await queue.get()
+        finally:
+            for task in producers:
+                task.cancel()
+
     async def get_funding_rates(
         self,
         exchange: str,
@@ -286,23 +496,21 @@ class LighterFundingDataSource(BaseFundingDataSource):
         end_time = int(time.time())
         start_time = end_time - 3600  # 1 hour ago
 
-        all_data = []
-
+        markets = {}
         for token in (tokens or []):
             market_id = self._get_market_id(token)
             if market_id is None:
                 logger.warning(f"Market ID not found for token: {token}")
                 continue
+            markets[token] = market_id
 
-            df = await self.get_historical_funding_rates(market_id, start_time, end_time, resolution="1h")
+        results = await self._gather_historical(markets, start_time, end_time, resolution="1h")
 
+        all_data = []
+        for token, df in results.items():
             if not df.empty:
                 # Get only the most recent record
-                df = df.sort_values('timestamp', ascending=False).head(1)
-                all_data.append(df)
-
-            # Rate limiting
-            await asyncio.sleep(0.5)
+                all_data.append(df.sort_values('timestamp', ascending=False).head(1))
 
         if all_data:
             return pd.concat(all_data, ignore_index=True)
@@ -368,45 +576,59 @@ class LighterFundingDataSource(BaseFundingDataSource):
         logger.info(f"Starting bulk download: {len(tokens)} tokens, {days} days")
         logger.info(f"Time range: {datetime.fromtimestamp(start_time)} to {datetime.fromtimestamp(end_time)}")
 
-        all_data = []
-
-        for i, token in enumerate(tokens, 1):
+        markets = {}
+        for token in tokens:
             market_id = self._get_market_id(token)
             if market_id is None:
                 logger.warning(f"  ⚠️  Market ID not found for {token}")
                 continue
+            markets[token] = market_id
 
-            logger.info(f"[{i}/{len(tokens)}] Downloading {token} (market_id: {market_id})...")
+        logger.info(f"Downloading {len(markets)} markets ({self.MAX_CONCURRENT_REQUESTS} concurrent)...")
 
-            df = await self.get_historical_funding_rates(
-                market_id=market_id,
-                start_time=start_time,
-                end_time=end_time,
-                resolution=resolution
-            )
+        # Spool each market's frame to an Arrow IPC file as it arrives instead of keeping
+        # every frame alive for a final pd.concat (which briefly holds two copies)
+        spool_fd, spool_name = tempfile.mkstemp(prefix='lighter_funding_', suffix='.arrow')
+        os.close(spool_fd)
+        spool_path = Path(spool_name)
+        writer = None
+        i = 0
 
-            if not df.empty:
-                all_data.append(df)
-                logger.info(f"  ✅ Downloaded {len(df)} records for {token}")
-            else:
-                logger.warning(f"  ⚠️  No data returned for {token}")
-
-            # Rate limiting between tokens
-            if i < len(tokens):
-                await asyncio.sleep(1)
-
-        if all_data:
-            combined_df = pd.concat(all_data, ignore_index=True)
-            combined_df = combined_df.sort_values('timestamp')
-
-            logger.info(f"✅ Bulk download complete: {len(combined_df)} total records")
-            logger.info(f"   Date range: {datetime.fromtimestamp(combined_df['timestamp'].min())} to {datetime.fromtimestamp(combined_df['timestamp'].max())}")
-            logger.info(f"   Tokens: {combined_df['base'].nunique()} ({', '.join(sorted(combined_df['base'].unique()))})")
-
-            return combined_df
-
-        logger.warning("❌ No data downloaded")
-        return pd.DataFrame()
+        try:
+            async for token, df in self._stream_historical(markets, start_time, end_time, resolution):
+                i += 1
+                if df.empty:
+                    logger.warning(f"  [{i}/{len(markets)}] ⚠️  No data returned for {token}")
+                    continue
+
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                if writer is None:
+                    writer = pa.ipc.new_file(spool_name, table.schema)
+                writer.write_table(table)
+                logger.info(f"  [{i}/{len(markets)}] ✅ Downloaded {len(df)} records for {token}")
+
+            if writer is None:
+                logger.warning("❌ No data downloaded")
+                return pd.DataFrame()
+
+            writer.close()
+            writer = None
+
+            # Low-cardinality string columns repeat on every row; materialize them as categories
+            with pa.memory_map(spool_name) as source:
+                combined_df = pa.ipc.open_file(source).read_pandas(strings_to_categorical=True)
+        finally:
+            if writer is not None:
+                writer.close()
+            spool_path.unlink(missing_ok=True)
+
+        combined_df = combined_df.sort_values('timestamp')
+
+        logger.info(f"✅ Bulk download complete: {len(combined_df)} total records")
+        logger.info(f"   Date range: {datetime.fromtimestamp(combined_df['timestamp'].min())} to {datetime.fromtimestamp(combined_df['timestamp'].max())}")
+        logger.info(f"   Tokens: {combined_df['base'].nunique()} ({', '.join(sorted(combined_df['base'].unique()))})")
+
+        return combined_df
 
     async def validate_exchanges(self, exchanges: List[str]) -> List[str]:
         """Validate that 'lighter' is in the exchanges list."""
@@ -5,47 +5,53 @@ import aiohttp
 import json
 
 
-async def main():
-    """Check markets."""
+async def check_markets(session: aiohttp.ClientSession):
+    """Check markets using an existing session."""
     url = "https://api.extended.exchange/api/v1/info/markets"
 
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as response:
-            data = await response.json()
+    async with session.get(url) as response:
+        data = await response.json()
+
+    markets = data.get('data', [])
+    print(f"Total markets: {len(markets)}")
 
-            markets = data.get('data', [])
-            print(f"Total markets: {len(markets)}")
+    # Find our target tokens
+    target_tokens = ['KAITO', 'IP', 'GRASS', 'ZEC', 'APT', 'SUI', 'TRUMP', 'LDO', 'OP', 'SEI']
 
-            # Find our target tokens
-            target_tokens = ['KAITO', 'IP', 'GRASS', 'ZEC', 'APT', 'SUI', 'TRUMP', 'LDO', 'OP', 'SEI']
+    print("\n" + "=" * 80)
+    print("Target Tokens on Extended")
+    print("=" * 80)
 
-            print("\n" + "=" * 80)
-            print("Target Tokens on Extended")
-            print("=" * 80)
+    found = []
+    for market in markets:
+        asset = market.get('assetName', '')
+        if asset in target_tokens:
+            name = market.get('name', '')
+            status = market.get('status', '')
+            stats = market.get('marketStats', {})
+            funding_rate = stats.get('fundingRate', '0')
 
-            found = []
-            for market in markets:
-                asset = market.get('assetName', '')
-                if asset in target_tokens:
-                    name = market.get('name', '')
-                    status = market.get('status', '')
-                    stats = market.get('marketStats', {})
-                    funding_rate = stats.get('fundingRate', '0')
+            print(f"\n{asset} ({name}):")
+            print(f"  Status: {status}")
+            print(f"  Funding Rate: {funding_rate}")
+            print(f"  Index Price: {stats.get('indexPrice', 'N/A')}")
+            print(f"  Last Price: {stats.get('lastPrice', 'N/A')}")
+            print(f"  Volume: {stats.get('dailyVolume', 'N/A')}")
 
-                    print(f"\n{asset} ({name}):")
-                    print(f"  Status: {status}")
-                    print(f"  Funding Rate: {funding_rate}")
-                    print(f"  Index Price: {stats.get('indexPrice', 'N/A')}")
-                    print(f"  Last Price: {stats.get('lastPrice', 'N/A')}")
-                    print(f"  Volume: {stats.get('dailyVolume', 'N/A')}")
+            found.append(asset)
 
-                    found.append(asset)
+    print(f"\n\nFound {len(found)}/{len(target_tokens)} tokens: {found}")
 
-            print(f"\n\nFound {len(found)}/{len(target_tokens)} tokens: {found}")
+    missing = [t for t in target_tokens if t not in found]
+    if missing:
+        print(f"Missing: {missing}")
 
-            missing = [t for t in target_tokens if t not in found]
-            if missing:
-                print(f"Missing: {missing}")
+
+async def main():
+    """Check markets."""
+    connector = aiohttp.TCPConnector(limit=32, limit_per_host=16, ttl_dns_cache=300, keepalive_timeout=75)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await check_markets(session)
 
 
 if __name__ == "__main__":
@@ -14,7 +14,10 @@ Output:
     - app/data/cache/funding/clean/lighter_historical_31d_cleaned.parquet
 """
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pathlib import Path
 from datetime import datetime
 import sys
@@ -28,13 +31,15 @@ def load_data():
     """Load raw funding rate data."""
     data_dir = project_root / 'app' / 'data' / 'cache' / 'funding' / 'raw'
 
-    extended_df = pd.read_parquet(data_dir / 'extended_historical_31d.parquet')
-    lighter_df = pd.read_parquet(data_dir / 'lighter_historical_31d.parquet')
+    # Only these columns feed the alignment; exchange/quote are re-added on output
+    columns = ['timestamp', 'base', 'funding_rate']
+    extended_df = pd.read_parquet(data_dir / 'extended_historical_31d.parquet', columns=columns)
+    lighter_df = pd.read_parquet(data_dir / 'lighter_historical_31d.parquet', columns=columns)
 
     # Round Extended timestamps to nearest hour (they're off by 1 second)
     # Extended: 1759618801 (19:00:01) → 1759618800 (19:00:00)
-    extended_df['timestamp'] = (extended_df['timestamp'] / 3600).round() * 3600
-    extended_df['timestamp'] = extended_df['timestamp'].astype(int)
+    ts = extended_df['timestamp'].to_numpy(dtype=np.int64)
+    extended_df['timestamp'] = ((ts + 1800) // 3600) * 3600
 
     print("="*80)
     print("LOADED RAW DATA")
@@ -58,23 +63,29 @@ def analyze_completeness(extended_df, lighter_df):
 
     completeness_report = []
 
-    for token in tokens:
-        ext_data = extended_df[extended_df['base'] == token]
-        lit_data = lighter_df[lighter_df['base'] == token]
+    # Unique timestamps and record counts per token, computed once per exchange
+    ext_ts = extended_df.groupby('base', observed=True)['timestamp'].unique()
+    lit_ts = lighter_df.groupby('base', observed=True)['timestamp'].unique()
+    ext_counts = extended_df['base'].value_counts()
+    lit_counts = lighter_df['base'].value_counts()
+    empty = np.array([], dtype=np.int64)
 
-        ext_timestamps = set(ext_data['timestamp'].unique())
-        lit_timestamps = set(lit_data['timestamp'].unique())
+    for token in tokens:
+        ext_timestamps = ext_ts.get(token, empty)
+        lit_timestamps = lit_ts.get(token, empty)
+        ext_records = int(ext_counts.get(token, 0))
+        lit_records = int(lit_counts.get(token, 0))
 
-        common = len(ext_timestamps & lit_timestamps)
-        total_unique = len(ext_timestamps | lit_timestamps)
+        common = np.intersect1d(ext_timestamps, lit_timestamps, assume_unique=True).size
+        total_unique = ext_timestamps.size + lit_timestamps.size - common
         overlap_pct = (common / total_unique * 100) if total_unique > 0 else 0
 
-        print(f"{token:<10} {len(ext_data):>10} {len(lit_data):>10} {common:>12} {overlap_pct:>9.1f}%")
+        print(f"{token:<10} {ext_records:>10} {lit_records:>10} {common:>12} {overlap_pct:>9.1f}%")
 
         completeness_report.append({
             'token': token,
-            'extended_records': len(ext_data),
-            'lighter_records': len(lit_data),
+            'extended_records': ext_records,
+            'lighter_records': lit_records,
             'common_timestamps': common,
             'overlap_pct': overlap_pct
         })
@@ -106,14 +117,8 @@ def create_unified_timestamp_grid(extended_df, lighter_df):
     print(f"Duration:       {(grid_end - grid_start) / 3600 / 24:.1f} days")
     print()
 
-    # Create hourly grid
-    timestamps = pd.date_range(
-        start=pd.to_datetime(grid_start, unit='s'),
-        end=pd.to_datetime(grid_end, unit='s'),
-        freq='1H'
-    )
-
-    timestamp_grid = [int(ts.timestamp()) for ts in timestamps]
+    # Create hourly grid (int64 unix seconds, shared by every exchange/token)
+    timestamp_grid = np.arange(grid_start, grid_end + 1, 3600, dtype=np.int64)
 
     print(f"Generated {len(timestamp_grid)} hourly timestamps")
     print()
@@ -124,55 +129,42 @@ def create_unified_timestamp_grid(extended_df, lighter_df):
 def align_and_fill_data(df, timestamp_grid, exchange_name):
     """Align data to unified grid and forward-fill missing values."""
 
-    tokens = df['base'].unique()
-    aligned_records = []
-
     print(f"Aligning {exchange_name} data...")
 
-    for token in tokens:
-        token_data = df[df['base'] == token].copy()
-        token_data = token_data.sort_values('timestamp')
-
-        # Create complete dataframe with all timestamps
-        complete_df = pd.DataFrame({'timestamp': timestamp_grid})
-
-        # Merge with actual data
-        complete_df = complete_df.merge(
-            token_data[['timestamp', 'funding_rate']],
-            on='timestamp',
-            how='left'
-        )
-
-        # Forward fill missing funding rates (max 6 hours)
-        complete_df['funding_rate'] = complete_df['funding_rate'].fillna(method='ffill', limit=6)
-
-        # Backward fill remaining (for start of series)
-        complete_df['funding_rate'] = complete_df['funding_rate'].fillna(method='bfill', limit=6)
-
-        # Add metadata
-        complete_df['exchange'] = exchange_name
-        complete_df['base'] = token
-        complete_df['quote'] = 'USD'
-
-        # Track which records were filled
-        complete_df['filled'] = complete_df['funding_rate'].isna()
-
-        # Drop any remaining NaN (beyond fill limits)
-        before_drop = len(complete_df)
-        complete_df = complete_df.dropna(subset=['funding_rate'])
-        dropped = before_drop - len(complete_df)
-
-        aligned_records.append(complete_df)
-
-        filled_count = complete_df['filled'].sum()
-        print(f"  {token}: {len(complete_df)} records ({filled_count} filled, {dropped} dropped)")
-
-    result_df = pd.concat(aligned_records, ignore_index=True)
-
-    # Drop the 'filled' column
-    result_df = result_df.drop(columns=['filled'])
+    # One wide frame (timestamp x token) reindexed onto the grid replaces a merge per token.
+    # '_merge' plays the role of a merge indicator: it is NaN exactly where the grid has
+    # no source row, so fill status doesn't depend on re-scanning funding_rate afterwards.
+    pivoted = (
+        df.drop_duplicates(subset=['timestamp', 'base'], keep='last')
+        .assign(_merge=True)
+        .pivot(index='timestamp', columns='base', values=['funding_rate', '_merge'])
+        .reindex(pd.Index(timestamp_grid, name='timestamp'))
+    )
+    # float32 holds the API's ~6 significant digits with room to spare, at half the size
+    wide = pivoted['funding_rate'].astype(np.float32)
+    left_only = pivoted['_merge'].isna()
+
+    # Forward fill missing funding rates (max 6 hours), then backward fill the start of series
+    wide = wide.ffill(limit=6).bfill(limit=6)
+    remaining = wide.isna()
+
+    filled_counts = (left_only & ~remaining).sum()
+    dropped_counts = remaining.sum()
+    record_counts = len(wide) - dropped_counts
+
+    for token in wide.columns:
+        print(f"  {token}: {record_counts[token]} records ({filled_counts[token]} filled, {dropped_counts[token]} dropped)")
+
+    # Back to long format, token by token; drop anything still NaN (beyond fill limits)
+    result_df = (
+        wide.reset_index()
+        .melt(id_vars='timestamp', var_name='base', value_name='funding_rate')
+        .dropna(subset=['funding_rate'])
+    )
+    result_df['exchange'] = exchange_name
+    result_df['quote'] = 'USD'
 
-    return result_df
+    return result_df[['timestamp', 'funding_rate', 'exchange', 'base', 'quote']].reset_index(drop=True)
 
 
 def save_cleaned_data(extended_clean, lighter_clean):
@@ -184,8 +176,21 @@ def save_cleaned_data(extended_clean, lighter_clean):
     extended_path = output_dir / 'extended_historical_31d_cleaned.parquet'
     lighter_path = output_dir / 'lighter_historical_31d_cleaned.parquet'
 
-    extended_clean.to_parquet(extended_path, index=False)
-    lighter_clean.to_parquet(lighter_path, index=False)
+    # Low-cardinality string columns are written as dictionary-encoded pages, ZSTD-compressed.
+    # Each token goes into its own row group, so readers filtering on base (or a time range)
+    # skip whole groups from the footer statistics - the same pruning a token-partitioned
+    # dataset would give, without splitting the data into many small files.
+    string_cols = ['exchange', 'base', 'quote']
+
+    for df, path in ((extended_clean, extended_path), (lighter_clean, lighter_path)):
+        # Categorical copy for writing; the caller's frames are reused for verification
+        out = df.astype({column: 'category' for column in string_cols})
+        schema = pa.Schema.from_pandas(out, preserve_index=False)
+
+        with pq.ParquetWriter(path, schema, compression='zstd', compression_level=9,
+                              use_dictionary=string_cols) as writer:
+            for _, token_df in out.groupby('base', observed=True, sort=True):
+                writer.write_table(pa.Table.from_pandas(token_df, schema=schema, preserve_index=False))
 
     print()
     print("="*80)
@@ -215,11 +220,14 @@ def verify_alignment(extended_clean, lighter_clean):
 
     all_aligned = True
 
+    ext_groups = extended_clean.groupby('base', observed=True)['timestamp'].unique()
+    lit_groups = lighter_clean.groupby('base', observed=True)['timestamp'].unique()
+
     for token in tokens:
-        ext_ts = set(extended_clean[extended_clean['base'] == token]['timestamp'].unique())
-        lit_ts = set(lighter_clean[lighter_clean['base'] == token]['timestamp'].unique())
+        ext_ts = ext_groups[token]
+        lit_ts = lit_groups[token]
 
-        match = ext_ts == lit_ts
+        match = np.array_equal(np.sort(ext_ts), np.sort(lit_ts))
         match_str = "✅ YES" if match else "❌ NO"
 
         print(f"{token:<10} {len(ext_ts):>10} {len(lit_ts):>10} {match_str:>10}")
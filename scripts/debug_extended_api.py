@@ -8,7 +8,17 @@ import json
 from datetime import datetime
 
 
-async def debug_markets_endpoint():
+def preview_json(data, limit: int, items: int = 3) -> str:
+    """Pretty-print the head of a response, trimming long lists before serializing."""
+    if isinstance(data, list):
+        data = data[:items]
+    elif isinstance(data, dict):
+        data = {key: value[:items] if isinstance(value, list) else value for key, value in data.items()}
+
+    return json.dumps(data, indent=2)[:limit]
+
+
+async def debug_markets_endpoint(session: aiohttp.ClientSession):
     """Debug the markets endpoint."""
     print("=" * 80)
     print("DEBUG: Markets Endpoint")
@@ -16,27 +26,80 @@ async def debug_markets_endpoint():
 
     url = "https://api.extended.exchange/api/v1/info/markets"
 
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(url) as response:
-                print(f"Status: {response.status}")
-                print(f"Headers: {dict(response.headers)}")
-                print()
-
-                data = await response.json()
-                print(f"Response type: {type(data)}")
-                print(f"Response keys: {list(data.keys()) if isinstance(data, dict) else 'N/A'}")
-                print()
-                print("Raw JSON response:")
-                print(json.dumps(data, indent=2)[:2000])  # First 2000 chars
-
-        except Exception as e:
-            print(f"Error: {e}")
-            import traceback
-            traceback.print_exc()
-
-
-async def debug_funding_endpoint():
+    try:
+        async with session.get(url) as response:
+            print(f"Status: {response.status}")
+            print(f"Headers: {dict(response.headers)}")
+            print()
+
+            data = await response.json()
+            print(f"Response type: {type(data)}")
+            print(f"Response keys: {list(data.keys()) if isinstance(data, dict) else 'N/A'}")
+            print()
+            print("Raw JSON response:")
+            print(preview_json(data, 2000))  # First 2000 chars
+
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+async def probe_funding_market(session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                               market: str, start_time: int, end_time: int) -> dict:
+    """Fetch funding data for one market format and return what came back."""
+    url = f"https://api.extended.exchange/api/v1/info/{market}/funding"
+    params = {
+        "startTime": start_time,
+        "endTime": end_time,
+        "limit": 10
+    }
+    result = {"market": market, "url": url, "params": params}
+
+    async with semaphore:
+        async with session.get(url, params=params) as response:
+            result["status"] = response.status
+            if response.status == 200:
+                result["data"] = await response.json()
+            else:
+                result["text"] = await response.text()
+
+    return result
+
+
+def print_funding_probe(market: str, result) -> None:
+    """Print the outcome of a single funding probe."""
+    print(f"\nTesting market: {market}")
+
+    if isinstance(result, Exception):
+        print(f"Error: {result}")
+        return
+
+    print(f"URL: {result['url']}")
+    print(f"Params: {result['params']}")
+    print(f"Status: {result['status']}")
+
+    if result['status'] != 200:
+        print(f"Error response: {result['text'][:500]}")
+        return
+
+    data = result['data']
+    print(f"Response type: {type(data)}")
+
+    if isinstance(data, list):
+        print(f"Response length: {len(data)}")
+        if len(data) > 0:
+            print("First item:")
+            print(json.dumps(data[0], indent=2))
+    elif isinstance(data, dict):
+        print(f"Response keys: {list(data.keys())}")
+        print("Response:")
+        print(preview_json(data, 1000))
+    else:
+        print(f"Unexpected type: {data}")
+
+
+async def debug_funding_endpoint(session: aiohttp.ClientSession):
     """Debug the funding rate endpoint."""
     print("\n" + "=" * 80)
     print("DEBUG: Funding Rate Endpoint")
@@ -53,53 +116,35 @@ async def debug_funding_endpoint():
     end_time = int(datetime.now().timestamp())
     start_time = end_time - (7 * 24 * 3600)  # 7 days ago
 
-    async with aiohttp.ClientSession() as session:
-        for market in test_markets:
-            print(f"\nTesting market: {market}")
-            url = f"https://api.extended.exchange/api/v1/info/{market}/funding"
-            params = {
-                "startTime": start_time,
-                "endTime": end_time,
-                "limit": 10
-            }
-
-            print(f"URL: {url}")
-            print(f"Params: {params}")
-
-            try:
-                async with session.get(url, params=params) as response:
-                    print(f"Status: {response.status}")
-
-                    if response.status == 200:
-                        data = await response.json()
-                        print(f"Response type: {type(data)}")
-
-                        if isinstance(data, list):
-                            print(f"Response length: {len(data)}")
-                            if len(data) > 0:
-                                print("First item:")
-                                print(json.dumps(data[0], indent=2))
-                        elif isinstance(data, dict):
-                            print(f"Response keys: {list(data.keys())}")
-                            print("Response:")
-                            print(json.dumps(data, indent=2)[:1000])
-                        else:
-                            print(f"Unexpected type: {data}")
-                    else:
-                        text = await response.text()
-                        print(f"Error response: {text[:500]}")
-
-            except Exception as e:
-                print(f"Error: {e}")
-
-            await asyncio.sleep(1)
+    # Probes are independent, so fire them together instead of one per second
+    semaphore = asyncio.Semaphore(4)
+    results = await asyncio.gather(
+        *(probe_funding_market(session, semaphore, market, start_time, end_time)
+          for market in test_markets),
+        return_exceptions=True,
+    )
+
+    for market, result in zip(test_markets, results):
+        print_funding_probe(market, result)
 
 
 async def main():
     """Run debug tests."""
-    await debug_markets_endpoint()
-    await debug_funding_endpoint()
+    # One pooled keep-alive session for every request to the Extended API
+    connector = aiohttp.TCPConnector(limit_per_host=64, ttl_dns_cache=300)
+    timeout = aiohttp.ClientTimeout(total=10)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        await debug_markets_endpoint(session)
+        await debug_funding_endpoint(session)
 
 
 if __name__ == "__main__":
+    # Prefer libuv's event loop for the HTTP-heavy probes (uvloop has no Windows build)
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+
     asyncio.run(main())
@@ -2,6 +2,8 @@
 Debug: Why isn't the controller detecting funding opportunities?
 
 Tests if funding data is actually accessible to the controller.
+
+Run with --verbose to print every feed, lookup and spread instead of summaries.
 """
 
 import asyncio
@@ -25,6 +27,9 @@ from controllers.funding_rate_arb import FundingRateArbControllerConfig
 from core.backtesting.multi_connector_engine import MultiConnectorBacktestingEngine
 from core.backtesting import BacktestingEngine
 
+# Per-feed / per-pair tables are only printed when asked for
+VERBOSE = '--verbose' in sys.argv
+
 
 async def main():
     print()
@@ -49,10 +54,11 @@ async def main():
     print("="*80)
     if hasattr(data_provider, 'funding_feeds'):
         print(f"Total feeds: {len(data_provider.funding_feeds)}")
-        print()
-        for feed_key in sorted(data_provider.funding_feeds.keys()):
-            df = data_provider.funding_feeds[feed_key]
-            print(f"{feed_key:40} {len(df):5} records")
+        if VERBOSE:
+            print()
+            for feed_key in sorted(data_provider.funding_feeds.keys()):
+                df = data_provider.funding_feeds[feed_key]
+                print(f"{feed_key:40} {len(df):5} records")
     else:
         print("❌ NO funding_feeds attribute!")
     print()
@@ -69,36 +75,45 @@ async def main():
     print(f"Test timestamp: {datetime.fromtimestamp(test_time)}")
     print()
 
-    for connector in ['extended_perpetual', 'lighter_perpetual']:
-        for token in ['IP', 'KAITO', 'ZEC']:
-            trading_pair = f"{token}-USD"
-
-            funding_info = data_provider.get_funding_info(connector, trading_pair)
+    # Resolve the (connector, pair) combinations once; both sections below reuse the lookups
+    connectors = ['extended_perpetual', 'lighter_perpetual']
+    trading_pairs = {token: f"{token}-USD" for token in ['IP', 'KAITO', 'ZEC']}
+    pairs = [(connector, pair) for connector in connectors for pair in trading_pairs.values()]
+    funding_lookup = {(connector, pair): data_provider.get_funding_info(connector, pair) for connector, pair in pairs}
 
+    if VERBOSE:
+        for (connector, trading_pair), funding_info in funding_lookup.items():
             if funding_info:
                 print(f"{connector:25} {trading_pair:12} rate={funding_info.rate:.6f}")
             else:
                 print(f"{connector:25} {trading_pair:12} ❌ None")
+    else:
+        found = sum(1 for info in funding_lookup.values() if info)
+        print(f"{found}/{len(funding_lookup)} lookups returned funding info")
 
     print()
 
     # Calculate spreads
     print("CALCULATED SPREADS:")
     print("="*80)
-    for token in ['IP', 'KAITO', 'ZEC']:
-        trading_pair = f"{token}-USD"
-
-        ext_info = data_provider.get_funding_info('extended_perpetual', trading_pair)
-        light_info = data_provider.get_funding_info('lighter_perpetual', trading_pair)
+    qualifying = 0
+    for token, trading_pair in trading_pairs.items():
+        ext_info = funding_lookup[('extended_perpetual', trading_pair)]
+        light_info = funding_lookup[('lighter_perpetual', trading_pair)]
 
         if ext_info and light_info:
             spread = abs(float(ext_info.rate) - float(light_info.rate))
             qualifies = spread >= 0.003
-            status = "✅ QUALIFIES" if qualifies else "❌ Too small"
-            print(f"{token:8} spread={spread:.6f} ({spread*100:.4f}%) {status}")
-        else:
+            qualifying += qualifies
+            if VERBOSE:
+                status = "✅ QUALIFIES" if qualifies else "❌ Too small"
+                print(f"{token:8} spread={spread:.6f} ({spread*100:.4f}%) {status}")
+        elif VERBOSE:
             print(f"{token:8} ❌ Missing funding data")
 
+    if not VERBOSE:
+        print(f"{qualifying}/{len(trading_pairs)} tokens qualify (spread >= 0.3%)")
+
     print()
 
     # Now run actual backtest on just this one hour
@@ -162,11 +177,18 @@ async def main():
         print(f"✅ SUCCESS: Created {num_executors} executors")
         executors_df = result.executors_df
         if not executors_df.empty:
-            executors_df['token'] = executors_df['config'].apply(
-                lambda x: x.get('trading_pair', '').split('-')[0]
-            )
+            # Pull the pair out of each config dict once, then split all of them in one pass
+            pairs = executors_df['config'].map(lambda c: c.get('trading_pair', ''))
+            executors_df['token'] = pairs.str.split('-', n=1).str[0]
             print(f"Tokens: {executors_df['token'].unique()}")
 
 
 if __name__ == "__main__":
+    # Prefer libuv's event loop for the async backtest (uvloop has no Windows build)
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+
     asyncio.run(main())
@@ -8,7 +8,8 @@ This script runs a complete end-to-end test:
 4. Calculate spreads
 5. Display results
 
-Run with: python scripts/final_collection_test.py
+Run with: python scripts/final_collection_test.py [--verbose]
+(--verbose prints the sample rows and every token's spread, not just the best one)
 """
 
 import asyncio
@@ -20,30 +21,14 @@ from dotenv import load_dotenv
 
 load_dotenv('/Users/tdl321/quants-lab/.env')
 
-# Clear module cache
-for key in list(sys.modules.keys()):
-    if 'coingecko' in key or 'funding' in key:
-        del sys.modules[key]
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
 
-# Import modules fresh
-import importlib.util
+from core.data_sources.funding_rate_collector import FundingRateCollector
 
-spec_cg = importlib.util.spec_from_file_location(
-    'coingecko_funding',
-    '/Users/tdl321/quants-lab/core/data_sources/coingecko_funding.py'
-)
-coingecko_module = importlib.util.module_from_spec(spec_cg)
-spec_cg.loader.exec_module(coingecko_module)
-sys.modules['core.data_sources.coingecko_funding'] = coingecko_module
-
-spec = importlib.util.spec_from_file_location(
-    'funding_rate_collector',
-    '/Users/tdl321/quants-lab/core/data_sources/funding_rate_collector.py'
-)
-funding_collector_module = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(funding_collector_module)
-
-FundingRateCollector = funding_collector_module.FundingRateCollector
+# Row-level tables are only printed when asked for
+VERBOSE = '--verbose' in sys.argv
 
 
 async def main():
@@ -103,8 +88,9 @@ async def main():
     print(f"  Tokens: {historical_df['base'].nunique()} ({', '.join(sorted(historical_df['base'].unique()))})")
     print(f"  Snapshots: {historical_df['timestamp'].nunique()}")
 
-    print(f"\n📋 Sample Data:")
-    print(historical_df[['timestamp', 'exchange', 'base', 'funding_rate', 'index']].head(8).to_string(index=False))
+    if VERBOSE:
+        print(f"\n📋 Sample Data:")
+        print(historical_df[['timestamp', 'exchange', 'base', 'funding_rate', 'index']].head(8).to_string(index=False))
 
     print("\n" + "=" * 80)
     print("STEP 3: Calculate Spreads")
@@ -128,7 +114,10 @@ async def main():
         # Sort by spread
         spreads_sorted = spreads.sort_values('spread_pct', ascending=False)
 
-        # Display
+        # Display (just the best opportunity unless --verbose)
+        if not VERBOSE:
+            spreads_sorted = spreads_sorted.head(1)
+
         for _, row in spreads_sorted.iterrows():
             token = row['base']
             extended_rate = row.get('extended', 0) * 100
@@ -190,4 +179,11 @@ async def main():
 
 
 if __name__ == "__main__":
+    # Prefer libuv's event loop for the HTTP-heavy collection (uvloop has no Windows build)
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+
     asyncio.run(main())
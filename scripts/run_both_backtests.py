@@ -0,0 +1,69 @@
+"""
+Run Both Funding Rate Arbitrage Backtests
+
+Runs the strategy-based and controller-based backtests side by side for
+comparison. Each backtest runs in its own process (the engines keep
+per-run state and the simulation is CPU-bound), and each report is
+printed in full once its run finishes.
+
+Usage:
+    python scripts/run_both_backtests.py
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+
+BACKTESTS = {
+    "Strategy (v2_funding_rate_arb)": project_root / "scripts" / "run_funding_arb_backtest.py",
+    "Controller (funding_rate_arb)": project_root / "scripts" / "run_funding_arb_backtest_controller.py",
+}
+
+
+async def run_backtest(name: str, script: Path):
+    """Run one backtest script and return (name, exit code, combined output, seconds)."""
+    started = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, str(script),
+        cwd=str(project_root),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+    )
+    output, _ = await process.communicate()
+    return name, process.returncode, output.decode(errors="replace"), time.perf_counter() - started
+
+
+async def main():
+    print()
+    print("="*80)
+    print("FUNDING RATE ARBITRAGE BACKTESTS (Strategy vs Controller)")
+    print("="*80)
+    print()
+    print(f"Running {len(BACKTESTS)} backtests concurrently...")
+    print()
+
+    results = await asyncio.gather(*(run_backtest(name, script) for name, script in BACKTESTS.items()))
+
+    for name, returncode, output, elapsed in results:
+        print("#"*80)
+        print(f"# {name}")
+        print("#"*80)
+        print(output)
+
+    print("="*80)
+    print("SUMMARY")
+    print("="*80)
+    for name, returncode, _, elapsed in results:
+        status = "✅" if returncode == 0 else "❌"
+        print(f"{status} {name}: exit code {returncode} ({elapsed:.1f}s)")
+    print()
+
+    return all(returncode == 0 for _, returncode, _, _ in results)
+
+
+if __name__ == "__main__":
+    success = asyncio.run(main())
+    sys.exit(0 if success else 1)
@@ -14,6 +14,8 @@ from pathlib import Path
 from datetime import datetime
 from decimal import Decimal
 
+import numpy as np
+
 # Add paths
 project_root = Path(__file__).parent.parent
 hummingbot_root = project_root.parent / 'hummingbot'
@@ -139,15 +141,20 @@ async def main():
             print("- Data quality issues")
             return False
 
-        # Basic metrics
+        # Basic metrics - split the PNL column into wins and losses once and reuse both
+        pnl = executors_df['net_pnl_quote'].to_numpy(dtype=float)
+        gains = pnl[pnl > 0]
+        losses = pnl[pnl < 0]
+
         total_positions = len(executors_df)
-        profitable_positions = (executors_df['net_pnl_quote'] > 0).sum()
-        losing_positions = (executors_df['net_pnl_quote'] < 0).sum()
-        win_rate = (executors_df['net_pnl_quote'] > 0).mean()
+        profitable_positions = gains.size
+        losing_positions = losses.size
+        win_rate = profitable_positions / total_positions
 
-        total_pnl = executors_df['net_pnl_quote'].sum()
-        avg_profit = executors_df[executors_df['net_pnl_quote'] > 0]['net_pnl_quote'].mean() if profitable_positions > 0 else 0
-        avg_loss = executors_df[executors_df['net_pnl_quote'] < 0]['net_pnl_quote'].mean() if losing_positions > 0 else 0
+        total_pnl = np.nansum(pnl)  # NaN PNL skipped, as the pandas sum did
+        avg_profit = gains.mean() if profitable_positions > 0 else 0
+        avg_loss = losses.mean() if losing_positions > 0 else 0
+        profit_factor = gains.sum() / -losses.sum() if losing_positions > 0 else float('inf')
 
         print(f"Total Positions: {total_positions}")
         print(f"Profitable: {profitable_positions} ({win_rate:.1%} win rate)")
@@ -161,26 +168,32 @@ async def main():
         # Performance by token
         print("Performance by Token:")
         print("-" * 80)
-        token_performance = executors_df.groupby('trading_pair').agg({
-            'net_pnl_quote': ['sum', 'mean', 'count'],
-        }).round(2)
-        token_performance.columns = ['Total PNL', 'Avg PNL', 'Count']
-        token_performance['Win Rate'] = executors_df.groupby('trading_pair')['net_pnl_quote'].apply(
-            lambda x: (x > 0).mean()
-        )
+        # One grouping for every column; win rate is the mean of a boolean column, not an apply.
+        # Grouping on a categorical key hashes the few pair names once instead of per row
+        grouped = executors_df.assign(
+            is_win=executors_df['net_pnl_quote'] > 0,
+            trading_pair=executors_df['trading_pair'].astype('category'),
+        ).groupby('trading_pair', sort=False, observed=True)
+        token_performance = grouped.agg(**{
+            'Total PNL': ('net_pnl_quote', 'sum'),
+            'Avg PNL': ('net_pnl_quote', 'mean'),
+            'Count': ('net_pnl_quote', 'size'),
+            'Win Rate': ('is_win', 'mean'),
+        })
+        token_performance[['Total PNL', 'Avg PNL']] = token_performance[['Total PNL', 'Avg PNL']].round(2)
         token_performance = token_performance.sort_values('Total PNL', ascending=False)
         print(token_performance.to_string())
         print()
 
         # Risk metrics
-        max_profit = executors_df['net_pnl_quote'].max()
-        max_loss = executors_df['net_pnl_quote'].min()
+        max_profit = np.nanmax(pnl)
+        max_loss = np.nanmin(pnl)
 
         print("Risk Metrics:")
         print("-" * 80)
         print(f"Max Single Profit: ${max_profit:.2f}")
         print(f"Max Single Loss: ${max_loss:.2f}")
-        print(f"Profit Factor: {abs(executors_df[executors_df['net_pnl_quote'] > 0]['net_pnl_quote'].sum() / executors_df[executors_df['net_pnl_quote'] < 0]['net_pnl_quote'].sum()) if losing_positions > 0 else float('inf'):.2f}")
+        print(f"Profit Factor: {profit_factor:.2f}")
         print()
 
         # Save results
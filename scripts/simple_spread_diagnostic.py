@@ -8,7 +8,9 @@ Usage:
     python scripts/simple_spread_diagnostic.py
 """
 
+import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
 from pathlib import Path
 from datetime import datetime
 from decimal import Decimal
@@ -42,71 +44,65 @@ print()
 extended_file = funding_data_path / "extended_historical_31d_cleaned.parquet"
 lighter_file = funding_data_path / "lighter_historical_31d_cleaned.parquet"
 
-extended_df = pd.read_parquet(extended_file)
-lighter_df = pd.read_parquet(lighter_file)
-
-print(f"Extended data: {len(extended_df)} rows")
-print(f"Lighter data: {len(lighter_df)} rows")
+# Row counts come from the parquet footers; nothing is decoded yet
+print(f"Extended data: {pq.ParquetFile(extended_file).metadata.num_rows} rows")
+print(f"Lighter data: {pq.ParquetFile(lighter_file).metadata.num_rows} rows")
 print()
 
-# Filter by time and tokens
-extended_df = extended_df[
-    (extended_df['timestamp'] >= start) &
-    (extended_df['timestamp'] <= end) &
-    (extended_df['base'].isin(tokens))
-].copy()
+# Filter by time and tokens inside the reader: only the needed columns are decoded,
+# and row groups outside the window/tokens are skipped using their statistics
+columns = ['timestamp', 'base', 'funding_rate']
+filters = [('timestamp', '>=', start), ('timestamp', '<=', end), ('base', 'in', tokens)]
 
-lighter_df = lighter_df[
-    (lighter_df['timestamp'] >= start) &
-    (lighter_df['timestamp'] <= end) &
-    (lighter_df['base'].isin(tokens))
-].copy()
+extended_df = pd.read_parquet(extended_file, columns=columns, filters=filters)
+lighter_df = pd.read_parquet(lighter_file, columns=columns, filters=filters)
 
 print(f"After filtering: Extended {len(extended_df)} rows, Lighter {len(lighter_df)} rows")
 print()
 
-all_data = []
+# One merge over every token at once: the (timestamp, base) key keeps tokens apart,
+# so there is no per-token filtering, merging and re-concatenation
+ext_counts = extended_df['base'].value_counts()
+light_counts = lighter_df['base'].value_counts()
 
-for token in tokens:
-    ext_token = extended_df[extended_df['base'] == token].copy()
-    light_token = lighter_df[lighter_df['base'] == token].copy()
+df = pd.merge(
+    extended_df,
+    lighter_df,
+    on=['timestamp', 'base'],
+    suffixes=('_extended', '_lighter')
+).rename(columns={'base': 'token'})
 
-    print(f"{token:8} Extended: {len(ext_token):4} rows, Lighter: {len(light_token):4} rows")
+merged_counts = df['token'].value_counts()
 
-    if ext_token.empty or light_token.empty:
-        print(f"         ❌ Missing data!")
-        continue
-
-    # Merge on timestamp
-    merged = pd.merge(
-        ext_token[['timestamp', 'funding_rate']],
-        light_token[['timestamp', 'funding_rate']],
-        on='timestamp',
-        suffixes=('_extended', '_lighter')
-    )
+for token in tokens:
+    ext_rows = int(ext_counts.get(token, 0))
+    light_rows = int(light_counts.get(token, 0))
+    print(f"{token:8} Extended: {ext_rows:4} rows, Lighter: {light_rows:4} rows")
 
-    if merged.empty:
+    if ext_rows == 0 or light_rows == 0:
+        print(f"         ❌ Missing data!")
+    elif merged_counts.get(token, 0) == 0:
         print(f"         ❌ No overlapping timestamps!")
-        continue
-
-    # Calculate spread
-    merged['spread'] = abs(merged['funding_rate_extended'] - merged['funding_rate_lighter'])
-    merged['spread_pct'] = merged['spread'] * 100
-    merged['token'] = token
-    merged['datetime'] = pd.to_datetime(merged['timestamp'], unit='s')
-
-    all_data.append(merged)
-
-    print(f"         ✅ {len(merged)} matching timestamps")
+    else:
+        print(f"         ✅ {merged_counts[token]} matching timestamps")
 
 print()
 
-if not all_data:
+if df.empty:
     print("❌ No data loaded!")
     exit(1)
 
-# Combine all
-df = pd.concat(all_data, ignore_index=True)
+# Keep the token-by-token row order of the report
+df['token'] = pd.Categorical(df['token'].astype(str), categories=tokens)
+df = df.sort_values(['token', 'timestamp'], ignore_index=True)
+
+# Calculate spread: subtract and take abs in place on one buffer
+spread = np.subtract(df['funding_rate_extended'].to_numpy(),
+                     df['funding_rate_lighter'].to_numpy())
+np.abs(spread, out=spread)
+df['spread'] = spread
+df['spread_pct'] = spread * 100
+df['datetime'] = pd.to_datetime(df['timestamp'], unit='s')
 
 print("="*80)
 print("SPREAD ANALYSIS")
@@ -125,25 +121,54 @@ print("OPPORTUNITIES BY THRESHOLD:")
 print("="*80)
 print()
 
-for threshold in thresholds:
-    threshold_pct = threshold * 100
+spread_values = df['spread'].to_numpy()
+
+
+def top_spread_rows(rows, k=20):
+    """
+    Positional indices of the k largest spreads among `rows`, largest first.
+
+    argpartition finds the top k in O(N); only those k are then sorted.
+    """
+    if rows.size > k:
+        rows = rows[np.argpartition(-spread_values[rows], k - 1)[:k]]
+    return rows[np.argsort(-spread_values[rows], kind='stable')]
 
+
+# Per-token spreads sorted descending with running sums: one vector searchsorted per
+# token gives the opportunity count at every threshold, and count/mean/max for the
+# table follow from the counts without re-aggregating a slice per threshold
+threshold_arr = np.asarray(thresholds)
+token_stats = {}
+for token, spreads in df.groupby('token', observed=True)['spread']:
+    neg_sorted = np.sort(-spreads.to_numpy())
+    token_stats[token] = (
+        np.searchsorted(neg_sorted, -threshold_arr, side='right'),
+        np.cumsum(-neg_sorted),
+        -neg_sorted[0],
+    )
+
+for i, threshold in enumerate(thresholds):
     print(f"Threshold: {threshold:.4%}")
     print("-"*80)
 
-    opportunities = df[df['spread'] >= threshold]
-
-    if not opportunities.empty:
-        by_token = opportunities.groupby('token').agg({
-            'spread': ['count', 'mean', 'max'],
-            'spread_pct': ['mean', 'max']
-        }).round(6)
+    rows = {}
+    for token, (counts, running_sum, max_spread) in token_stats.items():
+        count = counts[i]
+        if count:
+            mean_spread = running_sum[count - 1] / count
+            rows[token] = (count, mean_spread, max_spread, mean_spread * 100, max_spread * 100)
 
-        by_token.columns = ['count', 'mean_spread', 'max_spread', 'mean_pct', 'max_pct']
+    if rows:
+        by_token = pd.DataFrame.from_dict(
+            rows, orient='index',
+            columns=['count', 'mean_spread', 'max_spread', 'mean_pct', 'max_pct']
+        ).round(6)
+        by_token.index.name = 'token'
 
         print(by_token.to_string())
         print()
-        print(f"Total: {len(opportunities)} opportunities across {opportunities['token'].nunique()} tokens")
+        print(f"Total: {by_token['count'].sum()} opportunities across {len(rows)} tokens")
     else:
         print("No opportunities at this threshold")
 
@@ -155,7 +180,7 @@ print("SAMPLE OPPORTUNITIES AT 0.30% THRESHOLD")
 print("="*80)
 print()
 
-sample_opps = df[df['spread'] >= 0.003].nlargest(20, 'spread')
+sample_opps = df.iloc[top_spread_rows(np.flatnonzero(spread_values >= 0.003))]
 
 if not sample_opps.empty:
     print(sample_opps[[
@@ -167,7 +192,7 @@ else:
     print("No opportunities found at 0.30% threshold during this week!")
     print()
     print("Highest spreads detected:")
-    top = df.nlargest(20, 'spread')
+    top = df.iloc[top_spread_rows(np.arange(len(df)))]
     print(top[[
         'datetime', 'token', 'spread_pct',
         'funding_rate_extended', 'funding_rate_lighter'
@@ -183,48 +208,42 @@ print()
 print("Simulating 120-second delay effect on opportunity detection...")
 print()
 
-# For each hour, check if opportunity exists at T-120s
-df_sorted = df.sort_values(['token', 'timestamp'])
-
-# Round to hourly intervals
-df_sorted['hour'] = (df_sorted['timestamp'] // 3600) * 3600
-
-delayed_opportunities = []
-
-for token in tokens:
-    token_data = df_sorted[df_sorted['token'] == token].copy()
-
-    for hour in token_data['hour'].unique():
-        # Decision time is 2 minutes before the hour
-        decision_time = hour - 120
-
-        # What data is available at decision time?
-        available_data = token_data[token_data['timestamp'] <= decision_time]
-
-        if available_data.empty:
-            continue
-
-        # Most recent data point
-        latest = available_data.iloc[-1]
-
-        # Check if this meets threshold
-        if latest['spread'] >= 0.003:  # 0.30%
-            delayed_opportunities.append({
-                'hour': hour,
-                'datetime': datetime.fromtimestamp(hour).isoformat(),
-                'token': token,
-                'spread': latest['spread'],
-                'spread_pct': latest['spread_pct'],
-                'data_age_seconds': decision_time - latest['timestamp']
-            })
-
-delayed_df = pd.DataFrame(delayed_opportunities)
+# For each hour, check if opportunity exists at T-120s.
+# df is already ordered by (token, timestamp), so hours are rounded on the raw array
+hours = (df['timestamp'].to_numpy() // 3600) * 3600
+
+# Decision time is 2 minutes before each hour; an as-of join picks the most recent
+# data point at or before it, per token, in one sorted pass
+# Rows run through each token's hours in order, so the distinct (token, hour) pairs
+# are simply where either key changes from the previous row - no hashing needed
+token_codes = df['token'].cat.codes.to_numpy()
+new_pair = np.ones(len(df), dtype=bool)
+new_pair[1:] = (token_codes[1:] != token_codes[:-1]) | (hours[1:] != hours[:-1])
+
+decisions = pd.DataFrame({'token': df['token'].array[new_pair], 'hour': hours[new_pair]})
+decisions['decision_time'] = decisions['hour'] - 120
+
+delayed_df = pd.merge_asof(
+    decisions.sort_values('decision_time', kind='stable'),
+    df[['token', 'timestamp', 'spread', 'spread_pct']].sort_values('timestamp', kind='stable'),
+    left_on='decision_time',
+    right_on='timestamp',
+    by='token',
+    direction='backward'
+).dropna(subset=['timestamp'])
+
+# Check if this meets threshold (0.30%)
+delayed_df = delayed_df[delayed_df['spread'] >= 0.003]
+delayed_df = delayed_df.assign(
+    datetime=pd.to_datetime(delayed_df['hour'], unit='s'),
+    data_age_seconds=delayed_df['decision_time'] - delayed_df['timestamp']
+)[['hour', 'datetime', 'token', 'spread', 'spread_pct', 'data_age_seconds']]
 
 if not delayed_df.empty:
     print(f"Opportunities detected with 120s delay: {len(delayed_df)}")
     print()
 
-    by_token = delayed_df.groupby('token').agg({
+    by_token = delayed_df.groupby('token', observed=True).agg({
         'spread': ['count', 'mean'],
         'data_age_seconds': 'mean'
     }).round(2)
@@ -244,7 +263,7 @@ print("="*80)
 print()
 
 # Compare: raw opportunities vs delayed opportunities
-raw_opps_030 = len(df[df['spread'] >= 0.003])
+raw_opps_030 = int(np.count_nonzero(spread_values >= 0.003))
 delayed_opps_030 = len(delayed_df) if not delayed_df.empty else 0
 
 print(f"Raw opportunities (0.30% threshold): {raw_opps_030}")
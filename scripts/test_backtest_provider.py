@@ -9,6 +9,9 @@ Run with: python scripts/test_backtest_provider.py
 import sys
 from datetime import datetime
 
+import numpy as np
+import pandas as pd
+
 # Import directly
 import importlib.util
 
@@ -142,13 +145,15 @@ def main():
     print()
 
     # Get all unique timestamps
-    timestamps = sorted(data['timestamp'].unique())
+    timestamps = np.sort(data['timestamp'].unique())
 
     arbitrage_opportunities = []
 
     for ts in timestamps:
-        for token in provider.tokens:
-            best = provider.get_best_spread(ts, token)
+        # Resolve the bar once, then query every token through the index-based accessor
+        time_idx = provider.time_index_of(ts)
+        for token_idx, token in enumerate(provider.tokens):
+            best = provider.get_best_spread_at(time_idx, token_idx)
             if best and best[2] > 0.003:  # 0.3% threshold
                 arbitrage_opportunities.append({
                     'timestamp': ts,
@@ -158,14 +163,15 @@ def main():
                     'spread': best[2]
                 })
 
+    arbitrage_opportunities = pd.DataFrame(arbitrage_opportunities)
+
     print(f"  ✅ Processed {len(timestamps)} timestamps")
     print(f"  ✅ Found {len(arbitrage_opportunities)} arbitrage opportunities (>0.3% spread)")
 
-    if arbitrage_opportunities:
+    if not arbitrage_opportunities.empty:
         print(f"\n  Top 5 opportunities:")
-        sorted_opps = sorted(arbitrage_opportunities, key=lambda x: x['spread'], reverse=True)
-        for opp in sorted_opps[:5]:
-            print(f"    {datetime.fromtimestamp(opp['timestamp'])}: {opp['token']} - {opp['spread']*100:.2f}% ({opp['ex1']} <-> {opp['ex2']})")
+        for opp in arbitrage_opportunities.nlargest(5, 'spread').itertuples(index=False):
+            print(f"    {datetime.fromtimestamp(opp.timestamp)}: {opp.token} - {opp.spread*100:.2f}% ({opp.ex1} <-> {opp.ex2})")
     print()
 
     print("=" * 80)
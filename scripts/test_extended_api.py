@@ -7,45 +7,31 @@ This script tests the Extended data source to verify:
 3. Historical funding rate endpoint
 4. Data format and schema
 
-Run with: python scripts/test_extended_api.py
+Run with: python scripts/test_extended_api.py [--verbose]
 """
 
 import asyncio
 import sys
-import importlib.util
 from pathlib import Path
 from datetime import datetime, timedelta
 
-# Load modules directly to avoid __init__.py issues
-base_spec = importlib.util.spec_from_file_location(
-    'base_funding_source',
-    '/Users/tdl321/quants-lab/core/data_sources/base_funding_source.py'
-)
-base_module = importlib.util.module_from_spec(base_spec)
-sys.modules['base_funding_source'] = base_module
-sys.modules['core.data_sources.base_funding_source'] = base_module
-base_spec.loader.exec_module(base_module)
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
 
-extended_spec = importlib.util.spec_from_file_location(
-    'extended_funding',
-    '/Users/tdl321/quants-lab/core/data_sources/extended_funding.py'
-)
-extended_module = importlib.util.module_from_spec(extended_spec)
-extended_spec.loader.exec_module(extended_module)
+from core.data_sources.extended_funding import ExtendedFundingDataSource  # noqa: E402
 
-ExtendedFundingDataSource = extended_module.ExtendedFundingDataSource
+# Sample record tables are only rendered with --verbose
+VERBOSE = '--verbose' in sys.argv
 
 
-async def test_markets_endpoint():
+async def test_markets_endpoint(source: ExtendedFundingDataSource):
     """Test fetching available markets."""
     print("=" * 80)
     print("TEST 1: Fetch Available Markets")
     print("=" * 80)
 
-    source = ExtendedFundingDataSource()
-
     try:
-        await source.start()
         print(f"✅ Session started")
         print(f"✅ Markets fetched: {len(source.MARKET_MAPPINGS)}")
 
@@ -57,13 +43,15 @@ async def test_markets_endpoint():
 
             # Check for our target tokens
             target_tokens = ['KAITO', 'MON', 'IP', 'GRASS', 'ZEC', 'APT', 'SUI', 'TRUMP', 'LDO', 'OP', 'SEI']
-            found = [token for token in target_tokens if token in source.MARKET_MAPPINGS]
+            target = set(target_tokens)
+            available = source.MARKET_MAPPINGS.keys()
+            found = sorted(target & available)
+            missing = sorted(target - available)
 
             print(f"\n🎯 Target Tokens Found: {len(found)}/{len(target_tokens)}")
             for token in found:
                 print(f"  ✅ {token} -> {source.MARKET_MAPPINGS[token]}")
 
-            missing = [token for token in target_tokens if token not in source.MARKET_MAPPINGS]
             if missing:
                 print(f"\n⚠️  Missing Tokens: {', '.join(missing)}")
 
@@ -75,21 +63,14 @@ async def test_markets_endpoint():
         traceback.print_exc()
         return False
 
-    finally:
-        await source.stop()
-
 
-async def test_historical_endpoint():
+async def test_historical_endpoint(source: ExtendedFundingDataSource):
     """Test fetching historical funding rate data."""
     print("\n" + "=" * 80)
     print("TEST 2: Fetch Historical Funding Rates")
     print("=" * 80)
 
-    source = ExtendedFundingDataSource()
-
     try:
-        await source.start()
-
         # Test with KAITO (known to exist on Extended)
         test_market = "KAITO-USD"
         end_time = int(datetime.now().timestamp())
@@ -121,8 +102,9 @@ async def test_historical_endpoint():
         print(f"   Target: {df['target'].unique()}")
         print(f"   Funding rate range: {df['funding_rate'].min():.6f} to {df['funding_rate'].max():.6f}")
 
-        print(f"\n📋 Sample Records:")
-        print(df.head().to_string(index=False))
+        if VERBOSE:
+            print(f"\n📋 Sample Records:")
+            print(df.head().to_string(index=False))
 
         return True
 
@@ -132,21 +114,14 @@ async def test_historical_endpoint():
         traceback.print_exc()
         return False
 
-    finally:
-        await source.stop()
-
 
-async def test_bulk_download():
+async def test_bulk_download(source: ExtendedFundingDataSource):
     """Test bulk download for multiple tokens."""
     print("\n" + "=" * 80)
     print("TEST 3: Bulk Download (3 tokens, 7 days)")
     print("=" * 80)
 
-    source = ExtendedFundingDataSource()
-
     try:
-        await source.start()
-
         # Test with subset of tokens
         test_tokens = ['KAITO', 'IP', 'GRASS']
 
@@ -165,19 +140,21 @@ async def test_bulk_download():
         print(f"\n✅ Success! Downloaded {len(df)} total records")
 
         print(f"\n📊 Data Summary:")
-        print(f"   Date range: {datetime.fromtimestamp(df['timestamp'].min())} to {datetime.fromtimestamp(df['timestamp'].max())}")
+        # bulk_download_historical returns rows sorted by timestamp, so the ends are the range
+        first_ts, last_ts = df['timestamp'].iat[0], df['timestamp'].iat[-1]
+        print(f"   Date range: {datetime.fromtimestamp(first_ts)} to {datetime.fromtimestamp(last_ts)}")
         print(f"   Tokens: {df['base'].nunique()} ({', '.join(sorted(df['base'].unique()))})")
         print(f"   Records per token:")
-        for token in sorted(df['base'].unique()):
-            count = len(df[df['base'] == token])
-            date_range = df[df['base'] == token]['timestamp']
-            print(f"     {token:10s}: {count:4d} records ({datetime.fromtimestamp(date_range.min())} to {datetime.fromtimestamp(date_range.max())})")
+        # One pass over the frame for every token's count and date range
+        per_token = df.groupby('base')['timestamp'].agg(['size', 'min', 'max'])
+        for token, (count, first_ts, last_ts) in per_token.iterrows():
+            print(f"     {token:10s}: {count:4d} records "
+                  f"({datetime.fromtimestamp(first_ts)} to {datetime.fromtimestamp(last_ts)})")
 
-        print(f"\n📋 Sample Records from Each Token:")
-        for token in sorted(df['base'].unique()):
-            token_df = df[df['base'] == token].head(2)
-            print(f"\n  {token}:")
-            print(f"    {token_df[['timestamp', 'funding_rate', 'index']].to_string(index=False)}")
+        if VERBOSE:
+            print(f"\n📋 Sample Records from Each Token:")
+            samples = df.groupby('base').head(2).sort_values('base', kind='stable')
+            print(samples[['base', 'timestamp', 'funding_rate', 'index']].to_string(index=False))
 
         return True
 
@@ -187,9 +164,6 @@ async def test_bulk_download():
         traceback.print_exc()
         return False
 
-    finally:
-        await source.stop()
-
 
 async def main():
     """Run all tests."""
@@ -200,14 +174,16 @@ async def main():
 
     results = {}
 
-    # Test 1: Markets endpoint
-    results['markets'] = await test_markets_endpoint()
+    # One source for all tests: the session and market mappings are set up once
+    async with ExtendedFundingDataSource() as source:
+        # Test 1: Markets endpoint
+        results['markets'] = await test_markets_endpoint(source)
 
-    # Test 2: Historical endpoint (single token)
-    results['historical'] = await test_historical_endpoint()
+        # Test 2: Historical endpoint (single token)
+        results['historical'] = await test_historical_endpoint(source)
 
-    # Test 3: Bulk download (multiple tokens)
-    results['bulk'] = await test_bulk_download()
+        # Test 3: Bulk download (multiple tokens)
+        results['bulk'] = await test_bulk_download(source)
 
     # Summary
     print("\n" + "=" * 80)
@@ -61,6 +61,7 @@ def main():
         ExtendedPerpetualMockConnector,
         LighterPerpetualMockConnector
     )
+    from core.backtesting.engine import build_funding_feed_meta
 
     extended_connector = ExtendedPerpetualMockConnector(data_provider)
     lighter_connector = LighterPerpetualMockConnector(data_provider)
@@ -181,25 +182,25 @@ def main():
     tokens = ["KAITO", "IP", "GRASS", "ZEC", "APT", "SUI", "TRUMP", "LDO", "OP", "SEI"]
     exchanges = ["extended", "lighter"]
 
-    coverage = []
-    for exchange in exchanges:
-        for token in tokens:
-            feed_key = f"{exchange}_perpetual_{token}-USD"
-            if feed_key in data_provider.funding_feeds:
-                df = data_provider.funding_feeds[feed_key]
-                coverage.append({
-                    'exchange': exchange,
-                    'token': token,
-                    'records': len(df),
-                    'start': datetime.fromtimestamp(df['timestamp'].min()),
-                    'end': datetime.fromtimestamp(df['timestamp'].max())
-                })
-
-    print(f"✅ Data coverage: {len(coverage)} exchange-token pairs")
+    # Per-feed (ts_min, ts_max, n), read once from each feed's sorted ends
+    feed_meta = build_funding_feed_meta(data_provider.funding_feeds)
+
+    # Covered (exchange, token) pairs in report order; details are read straight from
+    # the metadata when printed, so no per-row dicts are built
+    covered = [
+        (exchange, token, feed_meta[feed_key])
+        for exchange in exchanges
+        for token in tokens
+        if (feed_key := f"{exchange}_perpetual_{token}-USD") in feed_meta
+    ]
+
+    print(f"✅ Data coverage: {len(covered)} exchange-token pairs")
     print(f"\n  Sample (first 5):")
-    for item in coverage[:5]:
-        print(f"    {item['exchange']:8s} {item['token']:6s}: {item['records']:3d} records "
-              f"({item['start'].strftime('%Y-%m-%d')} to {item['end'].strftime('%Y-%m-%d')})")
+    for exchange, token, meta in covered[:5]:
+        start = datetime.fromtimestamp(meta['ts_min'])
+        end = datetime.fromtimestamp(meta['ts_max'])
+        print(f"    {exchange:8s} {token:6s}: {meta['n']:3d} records "
+              f"({start.strftime('%Y-%m-%d')} to {end.strftime('%Y-%m-%d')})")
 
     print()
 
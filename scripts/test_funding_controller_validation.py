@@ -11,6 +11,7 @@ Usage:
     python scripts/test_funding_controller_validation.py
 """
 
+import math
 import sys
 from pathlib import Path
 from datetime import datetime
@@ -25,11 +26,10 @@ from core.backtesting import BacktestingEngine
 from controllers.funding_rate_arb import FundingRateArbControllerConfig
 
 
-def test_funding_time_filtering():
+def test_funding_time_filtering(engine: BacktestingEngine):
     """Test 1: Verify funding queries only return past data."""
     print("Test 1: Funding time filtering...")
 
-    engine = BacktestingEngine(load_cached_data=True)
     data_provider = engine._bt_engine.backtesting_data_provider
 
     # Set time to middle of data range
@@ -44,23 +44,27 @@ def test_funding_time_filtering():
         print("   ⚠️  No funding data at test timestamp")
         return False
 
-    # Get raw data
+    # Get raw data, ordered by time once
     raw_df = data_provider.funding_feeds["extended_perpetual_KAITO-USD"]
+    raw_df = raw_df.sort_values('timestamp', kind='stable')
 
-    # Find the actual timestamp of returned data
-    matching_row = raw_df[raw_df['funding_rate'] == float(funding.rate)]
+    # Latest record at or before the current time (binary search on the timestamps)
+    idx = raw_df['timestamp'].searchsorted(test_time, side='right') - 1
 
-    if matching_row.empty:
-        print("   ❌ Could not find matching funding rate in raw data")
+    if idx < 0:
+        print("   ❌ No raw funding data at or before test timestamp")
         return False
 
-    actual_timestamp = matching_row.iloc[-1]['timestamp']
+    actual_timestamp = raw_df['timestamp'].iat[idx]
+    expected_rate = float(raw_df['funding_rate'].iat[idx])
 
-    # Verify it's from the past
-    if actual_timestamp > test_time:
-        print(f"   ❌ LOOKAHEAD BIAS: Using future data!")
+    # The connector must return exactly that record - anything else means it read
+    # a different (possibly future) row
+    if not math.isclose(float(funding.rate), expected_rate, rel_tol=1e-9, abs_tol=1e-12):
+        print(f"   ❌ LOOKAHEAD BIAS: Returned rate is not the latest past record!")
         print(f"      Current time: {test_time}")
-        print(f"      Data timestamp: {actual_timestamp}")
+        print(f"      Latest past record: {actual_timestamp} (rate {expected_rate})")
+        print(f"      Returned rate: {funding.rate}")
         return False
 
     lag_minutes = (test_time - actual_timestamp) / 60
@@ -87,11 +91,10 @@ def test_execution_delay():
     return True
 
 
-def test_no_future_spread_calculation():
+def test_no_future_spread_calculation(engine: BacktestingEngine):
     """Test 3: Verify spread calculations use only past data."""
     print("\nTest 3: Spread calculation timing...")
 
-    engine = BacktestingEngine(load_cached_data=True)
     data_provider = engine._bt_engine.backtesting_data_provider
 
     # Set time
@@ -118,13 +121,10 @@ def test_no_future_spread_calculation():
     return True
 
 
-def test_data_coverage():
+def test_data_coverage(engine: BacktestingEngine):
     """Test 4: Verify funding data coverage for backtest period."""
     print("\nTest 4: Data coverage verification...")
 
-    engine = BacktestingEngine(load_cached_data=True)
-    data_provider = engine._bt_engine.backtesting_data_provider
-
     # Expected backtest period
     start_time = int(datetime(2024, 10, 4, 20, 0, 0).timestamp())
     end_time = int(datetime(2024, 11, 4, 17, 0, 0).timestamp())
@@ -139,14 +139,15 @@ def test_data_coverage():
 
     all_covered = True
     for feed_key in test_feeds:
-        if feed_key not in data_provider.funding_feeds:
+        meta = engine.funding_feed_meta.get(feed_key)
+        if meta is None:
             print(f"   ❌ Missing feed: {feed_key}")
             all_covered = False
             continue
 
-        df = data_provider.funding_feeds[feed_key]
-        data_start = df['timestamp'].min()
-        data_end = df['timestamp'].max()
+        # Coverage recorded when the feeds were loaded; no rescan of the column
+        data_start = meta['ts_min']
+        data_end = meta['ts_max']
 
         if data_start > start_time or data_end < end_time:
             print(f"   ⚠️  Incomplete coverage for {feed_key}")
@@ -166,17 +167,20 @@ def main():
     print("="*80)
     print()
 
+    # Cached feeds are read once and shared; each test sets the provider time it needs
+    engine = BacktestingEngine(load_cached_data=True)
+
     tests = [
-        test_funding_time_filtering,
-        test_execution_delay,
-        test_no_future_spread_calculation,
-        test_data_coverage,
+        (test_funding_time_filtering, (engine,)),
+        (test_execution_delay, ()),
+        (test_no_future_spread_calculation, (engine,)),
+        (test_data_coverage, (engine,)),
     ]
 
     results = []
-    for test in tests:
+    for test, args in tests:
         try:
-            results.append(test())
+            results.append(test(*args))
         except Exception as e:
             print(f"   ❌ Test failed with exception: {e}")
             import traceback
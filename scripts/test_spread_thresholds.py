@@ -9,9 +9,12 @@ Usage:
 """
 
 import asyncio
+import calendar
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
 from decimal import Decimal
 import pandas as pd
 
@@ -42,7 +45,27 @@ THRESHOLDS_TO_TEST = [
 ]
 
 
-async def run_test(min_spread: Decimal, test_num: int, total_tests: int) -> dict:
+# Backtest period, fixed in UTC (Oct 4 20:00 EDT to Nov 4 17:00 EST) - the same window
+# as test_without_zec.py, independent of the machine's timezone
+START = calendar.timegm(datetime(2025, 10, 5, 0, 0, 0, tzinfo=timezone.utc).utctimetuple())
+END = calendar.timegm(datetime(2025, 11, 4, 22, 0, 0, tzinfo=timezone.utc).utctimetuple())
+
+# Per-process engine, built once by the pool initializer and reused for every threshold
+_worker_backtesting = None
+
+
+def build_backtesting() -> BacktestingEngine:
+    """Create the backtesting engine (loads cached candles and funding data once)."""
+    custom_engine = MultiConnectorBacktestingEngine()
+    return BacktestingEngine(
+        load_cached_data=True,
+        custom_backtester=custom_engine,
+        funding_date_range=(START, END)
+    )
+
+
+async def run_test(backtesting: BacktestingEngine, min_spread: Decimal,
+                   test_num: int, total_tests: int) -> dict:
     """Run backtest with specific spread threshold."""
 
     print(f"\n{'='*80}")
@@ -50,13 +73,6 @@ async def run_test(min_spread: Decimal, test_num: int, total_tests: int) -> dict
     print(f"{'='*80}")
 
     try:
-        # Initialize engine
-        custom_engine = MultiConnectorBacktestingEngine()
-        backtesting = BacktestingEngine(
-            load_cached_data=True,
-            custom_backtester=custom_engine
-        )
-
         # Configure controller
         config = FundingRateArbControllerConfig(
             controller_name="funding_rate_arb",
@@ -80,15 +96,11 @@ async def run_test(min_spread: Decimal, test_num: int, total_tests: int) -> dict
             execution_delay_seconds=120,
         )
 
-        # Backtest period
-        start = int(datetime(2025, 10, 4, 20, 0, 0).timestamp())
-        end = int(datetime(2025, 11, 4, 17, 0, 0).timestamp())
-
         # Run with actual connector fees
         result = await backtesting.run_backtesting(
             config,
-            start,
-            end,
+            START,
+            END,
             backtesting_resolution="1h",
             trade_cost=0.0  # Use connector fees
         )
@@ -98,11 +110,15 @@ async def run_test(min_spread: Decimal, test_num: int, total_tests: int) -> dict
 
         # Get token breakdown
         executors_df = result.executors_df
-        executors_df['token'] = executors_df['config'].apply(
-            lambda x: x.get('trading_pair', '').split('-')[0]
+        # Pull the pairs out of the config dicts once, then split them in one vectorized call
+        trading_pairs = pd.Series(
+            [config.get('trading_pair', '') for config in executors_df['config']],
+            index=executors_df.index,
         )
-        unique_tokens = executors_df['token'].nunique()
+        executors_df['token'] = trading_pairs.str.split('-', n=1).str[0]
+        # One hash pass over the column gives both the token list and its size
         tokens_traded = sorted(executors_df['token'].unique())
+        unique_tokens = len(tokens_traded)
 
         # Calculate metrics
         pnl_per_pair = results_dict['net_pnl_quote'] / num_pairs if num_pairs > 0 else 0
@@ -141,6 +157,17 @@ async def run_test(min_spread: Decimal, test_num: int, total_tests: int) -> dict
         }
 
 
+def _init_worker():
+    """Process-pool initializer: build this worker's engine before it takes any tests."""
+    global _worker_backtesting
+    _worker_backtesting = build_backtesting()
+
+
+def _run_test_worker(min_spread: Decimal, test_num: int, total_tests: int) -> dict:
+    """Process-pool entry point: run one threshold's backtest on its own event loop."""
+    return asyncio.run(run_test(_worker_backtesting, min_spread, test_num, total_tests))
+
+
 async def main():
     print()
     print("="*80)
@@ -153,11 +180,18 @@ async def main():
     print(f"Testing {len(THRESHOLDS_TO_TEST)} thresholds...")
     print()
 
-    results = []
+    # Each backtest is CPU-bound and independent, so run them in separate processes
+    # (threads would share the GIL). Results come back in threshold order. Only the
+    # controller config changes between thresholds, so each worker loads the engine
+    # and its cached data once and reuses it for every threshold it is handed.
+    loop = asyncio.get_running_loop()
+    max_workers = min(len(THRESHOLDS_TO_TEST), os.cpu_count() or 1)
 
-    for i, threshold in enumerate(THRESHOLDS_TO_TEST, 1):
-        result = await run_test(threshold, i, len(THRESHOLDS_TO_TEST))
-        results.append(result)
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as pool:
+        results = await asyncio.gather(*(
+            loop.run_in_executor(pool, _run_test_worker, threshold, i, len(THRESHOLDS_TO_TEST))
+            for i, threshold in enumerate(THRESHOLDS_TO_TEST, 1)
+        ))
 
     print()
     print("="*80)
@@ -168,10 +202,12 @@ async def main():
     # Create DataFrame
     df = pd.DataFrame(results)
 
-    # Save results
+    # Save results once, after every threshold has finished: CSV for reading,
+    # parquet for analysis scripts that reload the sweep
     output_file = project_root / "spread_threshold_analysis.csv"
     df.to_csv(output_file, index=False)
-    print(f"✅ Results saved to: {output_file}\n")
+    df.to_parquet(output_file.with_suffix('.parquet'), index=False, compression='zstd')
+    print(f"✅ Results saved to: {output_file} (+ .parquet)\n")
 
     # Display comparison
     if 'net_pnl' in df.columns:
@@ -9,56 +9,56 @@ Usage:
 """
 
 import asyncio
+import calendar
 import sys
 from pathlib import Path
-from datetime import datetime
+from typing import TYPE_CHECKING
+from datetime import datetime, timezone
 from decimal import Decimal
+import numpy as np
+import pandas as pd
 
 # Add paths
 project_root = Path(__file__).parent.parent
 hummingbot_root = project_root.parent / 'hummingbot'
 
-for path in [str(project_root), str(hummingbot_root)]:
-    while path in sys.path:
-        sys.path.remove(path)
+# Drop any existing entries in one pass, then put both roots at the front
+_roots = {str(project_root), str(hummingbot_root)}
+sys.path[:] = [path for path in sys.path if path not in _roots]
 
 sys.path.insert(0, str(project_root))
 sys.path.insert(1, str(hummingbot_root))
 
-from controllers.funding_rate_arb import FundingRateArbControllerConfig
-from core.backtesting.multi_connector_engine import MultiConnectorBacktestingEngine
-from core.backtesting import BacktestingEngine
+# The controller and engines pull in the full hummingbot import graph, so they are
+# imported inside build_config() and build_backtesting(), which first need them
+if TYPE_CHECKING:
+    from controllers.funding_rate_arb import FundingRateArbControllerConfig
 
 
-async def main():
-    print()
-    print("="*80)
-    print("DIAGNOSTIC TEST: STRATEGY WITHOUT ZEC")
-    print("="*80)
-    print()
-    print("Hypothesis: ZEC blocks other tokens due to one-position-per-token limit")
-    print("Test: Remove ZEC and see if IP, KAITO, APT, TRUMP trade")
-    print()
+# Backtest period, fixed in UTC: Oct 4 20:00 EDT to Nov 4 17:00 EST. Naive local
+# datetimes would move the window with the machine's timezone (and DST changes inside it).
+START = calendar.timegm(datetime(2025, 10, 5, 0, 0, 0, tzinfo=timezone.utc).utctimetuple())
+END = calendar.timegm(datetime(2025, 11, 4, 22, 0, 0, tzinfo=timezone.utc).utctimetuple())
 
-    # Initialize engine
-    print("Initializing engine...")
-    custom_engine = MultiConnectorBacktestingEngine()
-    backtesting = BacktestingEngine(
-        load_cached_data=True,
-        custom_backtester=custom_engine
-    )
-    print("✅ Engine initialized\n")
+CONNECTORS = frozenset({"extended_perpetual", "lighter_perpetual"})
+# EXCLUDE ZEC - only use other 9 tokens
+TOKENS = frozenset({"KAITO", "IP", "GRASS", "APT", "SUI", "TRUMP", "LDO", "OP", "SEI"})
 
-    # Configure WITHOUT ZEC
-    print("Configuring strategy WITHOUT ZEC...")
-    config = FundingRateArbControllerConfig(
+# Upper bound on the backtest run, so a stalled engine fails instead of hanging CI
+BACKTEST_TIMEOUT_SECONDS = 1800
+
+
+def build_config(tokens) -> "FundingRateArbControllerConfig":
+    """Controller config for the given token set (everything else fixed)."""
+    from controllers.funding_rate_arb import FundingRateArbControllerConfig
+
+    return FundingRateArbControllerConfig(
         controller_name="funding_rate_arb",
         connector_name="extended_perpetual",
         trading_pair="KAITO-USD",
 
-        connectors={"extended_perpetual", "lighter_perpetual"},
-        # EXCLUDE ZEC - only use other 9 tokens
-        tokens={"KAITO", "IP", "GRASS", "APT", "SUI", "TRUMP", "LDO", "OP", "SEI"},
+        connectors=CONNECTORS,
+        tokens=frozenset(tokens),
 
         leverage=5,
         min_funding_rate_profitability=Decimal('0.0005'),  # 0.05% - very low threshold
@@ -72,33 +72,92 @@ async def main():
         execution_delay_seconds=120,
     )
 
+
+def build_backtesting():
+    """Load the engine from the on-disk candle/funding caches."""
+    from core.backtesting import BacktestingEngine
+    from core.backtesting.multi_connector_engine import MultiConnectorBacktestingEngine
+
+    custom_engine = MultiConnectorBacktestingEngine()
+    return BacktestingEngine(
+        load_cached_data=True,
+        custom_backtester=custom_engine,
+        funding_date_range=(START, END)
+    )
+
+
+async def run_backtest(backtesting, config: "FundingRateArbControllerConfig") -> dict:
+    """Run the backtest and return the figures the report reads."""
+    result = await asyncio.wait_for(
+        backtesting.run_backtesting(
+            config,
+            START,
+            END,
+            backtesting_resolution="1h",
+            trade_cost=0.0  # Use connector fees
+        ),
+        timeout=BACKTEST_TIMEOUT_SECONDS
+    )
+    # Keep only the two columns the report reads: the trading pair (from the config
+    # dicts) and PnL as float64, instead of carrying the full object-heavy frame along
+    executors_df = result.executors_df
+    if executors_df.empty or 'config' not in executors_df.columns:
+        trades_df = pd.DataFrame({
+            'trading_pair': pd.Series(dtype=object),
+            'net_pnl_quote': pd.Series(dtype=np.float64),
+        })
+    else:
+        trades_df = pd.DataFrame({
+            'trading_pair': [executor_config.get('trading_pair', '') for executor_config in executors_df['config']],
+            'net_pnl_quote': executors_df['net_pnl_quote'].to_numpy(dtype=np.float64),
+        })
+
+    return {
+        'net_pnl_quote': float(result.results['net_pnl_quote']),
+        'total_executors': int(result.results['total_executors']),
+        'trades_df': trades_df,
+    }
+
+
+async def main():
+    print()
+    print("="*80)
+    print("DIAGNOSTIC TEST: STRATEGY WITHOUT ZEC")
+    print("="*80)
+    print()
+    print("Hypothesis: ZEC blocks other tokens due to one-position-per-token limit")
+    print("Test: Remove ZEC and see if IP, KAITO, APT, TRUMP trade")
+    print()
+
+    # Initialize engine
+    print("Initializing engine...")
+    backtesting = build_backtesting()
+    print("✅ Engine initialized\n")
+
+    # Configure WITHOUT ZEC
+    print("Configuring strategy WITHOUT ZEC...")
+    config = build_config(TOKENS)
+    # Sorted once for the printout
+    tokens_sorted = sorted(config.tokens)
+
     print("✅ Configuration:")
-    print(f"   Tokens: {', '.join(sorted(config.tokens))}")
+    print(f"   Tokens: {', '.join(tokens_sorted)}")
     print(f"   Min spread: {config.min_funding_rate_profitability:.4%}")
     print(f"   ZEC EXCLUDED: Should see IP, KAITO, APT, TRUMP if they have spreads")
     print()
 
-    # Backtest period
-    start = int(datetime(2025, 10, 4, 20, 0, 0).timestamp())
-    end = int(datetime(2025, 11, 4, 17, 0, 0).timestamp())
-
     print("Running backtest...")
     print()
 
     try:
-        result = await backtesting.run_backtesting(
-            config,
-            start,
-            end,
-            backtesting_resolution="1h",
-            trade_cost=0.0  # Use connector fees
-        )
+        # One backtest over the full token set: the diagnostic is about how tokens
+        # interact within a single run, so they are not split into separate backtests
+        results_dict = await run_backtest(backtesting, config)
 
         print("✅ Backtest completed!")
         print()
 
         # Analyze results
-        results_dict = result.results
         num_pairs = results_dict['total_executors'] // 2
 
         print(f"Net PNL: ${results_dict['net_pnl_quote']:.2f}")
@@ -107,43 +166,56 @@ async def main():
         print()
 
         # Get token breakdown
-        executors_df = result.executors_df
-        if not executors_df.empty and 'config' in executors_df.columns:
-            executors_df['token'] = executors_df['config'].apply(
-                lambda x: x.get('trading_pair', '').split('-')[0]
-            )
-
-            print("="*80)
-            print("RESULTS")
-            print("="*80)
+        executors_df = results_dict['trades_df']
+        if executors_df.empty:
+            print("❌ No trades executed")
+            print("   This is unexpected - IP and KAITO should have opportunities")
             print()
+            return
 
-            print(f"Net PNL: ${results_dict['net_pnl_quote']:.2f}")
-            print(f"Total Pairs: {num_pairs}")
-            print(f"Unique Tokens: {executors_df['token'].nunique()}")
-            print()
+        # Split the pairs in one vectorized call; categorical codes make the
+        # reductions below integer work. The object-dtype pair column is dropped
+        # (popped) in the same step, leaving only category codes and float64 PnL.
+        executors_df['token'] = executors_df.pop('trading_pair').str.split('-', n=1).str[0].astype('category')
 
-            print("TOKENS TRADED:")
-            print("="*80)
-            token_summary = executors_df.groupby('token').agg({
-                'net_pnl_quote': ['count', 'sum']
-            }).round(4)
-            print(token_summary.to_string())
-            print()
+        print("="*80)
+        print("RESULTS")
+        print("="*80)
+        print()
 
-            if executors_df['token'].nunique() > 0:
-                tokens_list = sorted(executors_df['token'].unique())
-                print(f"✅ SUCCESS: Other tokens DID trade without ZEC!")
-                print(f"   Tokens: {', '.join(tokens_list)}")
-                print()
-                print("CONCLUSION: The one-position-per-token limit is blocking opportunities.")
-                print("Fix: Remove the limit to allow concurrent positions across tokens.")
-            else:
-                print("❌ No tokens traded even without ZEC")
-                print("This suggests a different issue (data availability, spread calculation, etc.)")
+        print(f"Net PNL: ${results_dict['net_pnl_quote']:.2f}")
+        print(f"Total Pairs: {num_pairs}")
+        unique_tokens = executors_df['token'].nunique()
+        print(f"Unique Tokens: {unique_tokens}")
+        print()
+
+        print("TOKENS TRADED:")
+        print("="*80)
+        # count/sum per token straight off the category codes (NaN PnL not counted)
+        token_cat = executors_df['token'].cat
+        codes = token_cat.codes.to_numpy()
+        pnl = executors_df['net_pnl_quote'].to_numpy()
+        has_pnl = ~np.isnan(pnl)
+        n_tokens = len(token_cat.categories)
+        counts = np.bincount(codes[has_pnl], minlength=n_tokens)
+        sums = np.bincount(codes, weights=np.where(has_pnl, pnl, 0.0), minlength=n_tokens)
+
+        print(f"{'Token':<8} {'Count':>6} {'PNL Sum':>12}")
+        for token, count, pnl_sum in zip(token_cat.categories, counts, sums):
+            print(f"{token:<8} {count:>6d} {pnl_sum:>12.4f}")
+        print()
+
+        if unique_tokens > 0:
+            # Categories were inferred sorted and every one is observed
+            tokens_list = token_cat.categories
+            print(f"✅ SUCCESS: Other tokens DID trade without ZEC!")
+            print(f"   Tokens: {', '.join(tokens_list)}")
+            print()
+            print("CONCLUSION: The one-position-per-token limit is blocking opportunities.")
+            print("Fix: Remove the limit to allow concurrent positions across tokens.")
         else:
-            print("❌ No trades executed")
-            print("   This is unexpected - IP and KAITO should have opportunities")
+            print("❌ No tokens traded even without ZEC")
+            print("This suggests a different issue (data availability, spread calculation, etc.)")
 
         print()
 
@@ -154,4 +226,11 @@ async def main():
 
 
 if __name__ == "__main__":
+    # Prefer libuv's event loop for the async backtest (uvloop has no Windows build)
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+
     asyncio.run(main())